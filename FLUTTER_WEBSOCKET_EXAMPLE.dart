@@ -145,14 +145,12 @@ class PostureWebSocketService {
     }
     
     try {
-      // Convert to base64
-      final base64Image = base64Encode(imageBytes);
-      
-      // Send frame
-      final message = jsonEncode({
-        'type': 'frame',
-        'frame': base64Image,
-      });
+      // Send as a binary message: type byte 0 (frame) followed by the JPEG.
+      // Avoids base64 (~33% smaller) and JSON parsing on the server.
+      final message = (BytesBuilder(copy: false)
+            ..addByte(0)
+            ..add(imageBytes))
+          .toBytes();
       
       _channel!.sink.add(message);
     } catch (e) {
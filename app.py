@@ -1,37 +1,130 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 import uvicorn
-from fastapi.responses import JSONResponse
-import base64
+from fastapi.responses import HTMLResponse, JSONResponse, ORJSONResponse, StreamingResponse
+import binascii
 from pose_estimation import get_pose_keypoints_and_annotated_image
-from posture_analysis import PostureAnalyzer, PostureSession
+from posture_analysis import PostureAnalyzer, PostureResult, PostureSession, apply_draw_ops, LANDMARK_NAMES
 from posture_database import PostureDatabase
+from session_store import SessionStore
+from frame_batcher import FrameBatcher
+from frame_worker import init_worker, process_frame
+from utils import FrameDecoder, read_image_for_pose, read_image_size, image_to_bytes, to_base64, motion_thumbnail
 import logging
-import traceback
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
 import cv2
 import numpy as np
 from io import BytesIO
 import uuid
+import secrets
+import itertools
 from datetime import datetime
 import json
+import orjson
+import msgspec
 import asyncio
+import os
+import anyio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict, deque
+from functools import lru_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Posture model variant: 0 = lite (fastest), 1 = full (default), 2 = heavy
+POSE_MODEL_COMPLEXITY = int(os.getenv("POSE_MODEL_COMPLEXITY", "1"))
+
+# Pose graphs in the shared analyzer = frames analyzed concurrently (each holds its own model)
+POSE_POOL_SIZE = int(os.getenv("POSE_POOL_SIZE", "1"))
+
 # Initialize posture analyzer and database
-posture_analyzer = PostureAnalyzer()
+posture_analyzer = PostureAnalyzer(model_complexity=POSE_MODEL_COMPLEXITY, pool_size=POSE_POOL_SIZE)
 posture_db = PostureDatabase()
+frame_batcher = FrameBatcher(posture_analyzer)
+
+# Optional worker processes for the REST analysis endpoints (0 = in-process).
+# Each worker loads its own pose model, so size this to the available memory.
+POSE_PROCESS_WORKERS = int(os.getenv("POSE_PROCESS_WORKERS", "0"))
+process_pool: Optional[ProcessPoolExecutor] = None
+
+def save_expired_session(session: PostureSession, reason: str):
+    """Persist a session dropped from the active store by expiry or eviction"""
+    stats = session.get_statistics()
+    stats['end_time'] = datetime.now().isoformat()
+    posture_db.save_session(stats)
+    if reason == SessionStore.EXPIRED:
+        logger.info("Expired idle posture session: %s", session.session_id)
+    else:
+        logger.info("Evicted posture session over the %d-session limit: %s",
+                    MAX_ACTIVE_SESSIONS, session.session_id)
+
+# Store active posture sessions (in-memory, bounded by idle TTL + LRU)
+SESSION_TTL_SECONDS = 3600
+MAX_ACTIVE_SESSIONS = 1000
+active_sessions = SessionStore(
+    max_sessions=MAX_ACTIVE_SESSIONS,
+    ttl_seconds=SESSION_TTL_SECONDS,
+    on_evict=save_expired_session,
+    # Sessions with a connected WebSocket are still streaming frames
+    in_use=lambda session_id: session_id in active_websockets
+)
+
+# Binary WebSocket message type tags (first byte of each binary message)
+WS_MESSAGE_TYPES = {0: "frame", 1: "ping", 2: "end_session"}
+
+
+# Motion gating for the stream: while the mean thumbnail difference from the last
+# analyzed frame stays below MOTION_THRESHOLD (gray levels), its result is reused,
+# but inference re-runs at least every MOTION_REVALIDATE_FRAMES frames. 0 disables it
+MOTION_THRESHOLD = float(os.getenv("MOTION_THRESHOLD", "2.0"))
+MOTION_REVALIDATE_FRAMES = int(os.getenv("MOTION_REVALIDATE_FRAMES", "15"))
+
+class StreamFrame(msgspec.Struct, omit_defaults=True):
+    """Per-frame WebSocket response; unset optional fields are left out of the JSON"""
+    status: str
+    posture_status: str
+    posture_score: int
+    is_good_posture: bool
+    timestamp: str
+    metrics: Optional[Dict] = None
+    session_stats: Optional[Dict] = None
+
+
+stream_encoder = msgspec.json.Encoder()
 
-# Store active posture sessions (in-memory)
-active_sessions: Dict[str, PostureSession] = {}
+# Session ids: per-process random prefix (folding in the worker pid) + counter
+_session_prefix = f"{secrets.token_hex(4)}{os.getpid():x}"
+_session_counter = itertools.count()
 
 # Store active WebSocket connections
 active_websockets: Dict[str, WebSocket] = {}
 
-app = FastAPI(title="Pose Estimation API")
+# Upload limits
+MAX_UPLOAD = 2 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Recently annotated frames served as binary JPEG (token -> bytes, LRU)
+MAX_FRAME_IMAGES = 64
+frame_images: "OrderedDict[str, bytes]" = OrderedDict()
+
+# Recent analyses keyed by (upload hash, draw_landmarks), LRU
+MAX_CACHED_ANALYSES = 256
+analysis_cache: "OrderedDict[Tuple[int, bool], Tuple[PostureResult, bytes]]" = OrderedDict()
+
+# Base64 of recently returned annotated JPEGs (jpeg bytes -> base64 str, LRU)
+MAX_CACHED_IMAGE_BASE64 = 64
+image_base64_cache: "OrderedDict[bytes, str]" = OrderedDict()
+
+# Wall-clock timestamp for streamed frames, refreshed by a background task
+CLOCK_INTERVAL = 0.1
+current_iso = datetime.now().isoformat()
+clock_task: Optional[asyncio.Task] = None
+
+app = FastAPI(title="Pose Estimation API", default_response_class=ORJSONResponse)
 
 # Configure CORS
 app.add_middleware(
@@ -42,50 +135,303 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-def validate_image(image_bytes: bytes) -> Optional[np.ndarray]:
-    """Validate and process the uploaded image"""
+@app.on_event("startup")
+async def configure_threadpool():
+    """Bound the worker threads used for decoding, inference and encoding"""
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = 2 * (os.cpu_count() or 1)
+
+
+@app.on_event("startup")
+async def check_worker_count():
+    """Warn when uvicorn runs several workers: sessions are process-local"""
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    if workers > 1:
+        logger.warning(
+            "WEB_CONCURRENCY=%d: active sessions and WebSockets are per-process; "
+            "route requests by session_id (sticky routing) or run a single worker",
+            workers
+        )
+
+
+@app.on_event("startup")
+async def start_frame_batcher():
+    """Start coalescing posture analysis requests"""
+    frame_batcher.start()
+
+
+@app.on_event("shutdown")
+async def stop_frame_batcher():
+    await frame_batcher.stop()
+
+
+async def tick_clock():
+    """Refresh current_iso every CLOCK_INTERVAL seconds"""
+    global current_iso
+    while True:
+        current_iso = datetime.now().isoformat()
+        await asyncio.sleep(CLOCK_INTERVAL)
+
+
+@app.on_event("startup")
+async def start_clock():
+    """Start the cached clock used for stream frame timestamps"""
+    global clock_task
+    clock_task = asyncio.create_task(tick_clock())
+
+
+@app.on_event("shutdown")
+async def stop_clock():
+    if clock_task is not None:
+        clock_task.cancel()
+
+
+@app.on_event("shutdown")
+async def close_database():
+    posture_db.close()
+
+
+@app.on_event("startup")
+async def start_process_pool():
+    """Start the optional worker processes for the REST analysis pipeline"""
+    global process_pool
+    if POSE_PROCESS_WORKERS > 0:
+        # spawn, not fork: MediaPipe's inference threads don't survive a fork
+        process_pool = ProcessPoolExecutor(
+            max_workers=POSE_PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(POSE_MODEL_COMPLEXITY,)
+        )
+        logger.info("Started %d pose worker processes", POSE_PROCESS_WORKERS)
+
+
+@app.on_event("shutdown")
+async def stop_process_pool():
+    if process_pool is not None:
+        process_pool.shutdown(cancel_futures=True)
+
+
+async def read_upload(file: UploadFile) -> bytes:
+    """Read an uploaded file in chunks, rejecting it once it exceeds MAX_UPLOAD"""
+    if file.size is not None and file.size > MAX_UPLOAD:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Image too large (max {MAX_UPLOAD // (1024 * 1024)} MB)"
+        )
+    
+    buf = bytearray()
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        buf.extend(chunk)
+        if len(buf) > MAX_UPLOAD:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Image too large (max {MAX_UPLOAD // (1024 * 1024)} MB)"
+            )
+    return bytes(buf)
+
+def validate_image(image_bytes: bytes) -> Optional[Tuple[int, int]]:
+    """Validate the uploaded image from its header, without decoding pixels"""
     try:
-        # Convert bytes to numpy array
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        # Decode image
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        size = read_image_size(image_bytes)
         
-        if image is None:
-            raise ValueError("Failed to decode image")
+        if size is None:
+            raise ValueError("Unsupported or corrupted image header")
             
         # Check image dimensions
-        height, width = image.shape[:2]
+        width, height = size
         if width < 100 or height < 100:
             raise ValueError("Image dimensions too small")
             
-        # Check image format
-        if len(image.shape) != 3 or image.shape[2] != 3:
-            raise ValueError("Invalid image format")
-            
-        return image
+        return size
     except Exception as e:
-        logger.error(f"Image validation error: {str(e)}")
+        logger.error("Image validation error: %s", e)
         return None
 
-@app.post("/analyze-pose")
-async def analyze_pose(file: UploadFile = File(...)):
-    try:
-        # Read the uploaded file
-        contents = await file.read()
-        
-        # Validate image
-        image = validate_image(contents)
+def annotate_and_encode(image: np.ndarray, draw_ops: List[Tuple]) -> bytes:
+    """Apply drawing primitives to the frame (in place, it is not reused) and encode it as JPEG"""
+    return image_to_bytes(apply_draw_ops(image, draw_ops))
+
+async def analyze_upload(contents: bytes, draw_landmarks: bool) -> Tuple[PostureResult, bytes]:
+    """
+    Analyze an uploaded image and return the result with the annotated JPEG
+    
+    Identical uploads (e.g. a still webcam) are served from analysis_cache,
+    skipping decode, inference, drawing and encoding.
+    """
+    cache_key = (hash(contents), draw_landmarks)
+    cached = analysis_cache.get(cache_key)
+    if cached is not None:
+        analysis_cache.move_to_end(cache_key)
+        return cached
+    
+    if process_pool is not None:
+        # Whole pipeline runs in a worker process
+        loop = asyncio.get_running_loop()
+        outcome = await loop.run_in_executor(process_pool, process_frame, contents, draw_landmarks)
+        if outcome is None:
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid image format or corrupted image"
+            )
+        result, annotated_image_bytes = outcome
+    else:
+        # Decode once (downscaled for the pose model); the same frame is analyzed and then annotated
+        image, frame_size = await run_in_threadpool(read_image_for_pose, contents)
         if image is None:
             raise HTTPException(
                 status_code=400,
                 detail="Invalid image format or corrupted image"
             )
+        
+        # Landmarks are kept so cached results can serve include_landmarks requests
+        result = await frame_batcher.analyze(image, draw_landmarks, frame_size, return_landmarks=True)
+        
+        # Draw the overlay onto the decoded frame in place and encode it in one pass
+        draw_ops = posture_analyzer.get_draw_ops(result)
+        annotated_image_bytes = await run_in_threadpool(annotate_and_encode, image, draw_ops)
+    
+    analysis_cache[cache_key] = (result, annotated_image_bytes)
+    while len(analysis_cache) > MAX_CACHED_ANALYSES:
+        analysis_cache.popitem(last=False)
+    
+    return result, annotated_image_bytes
+
+async def read_validated_upload(file: UploadFile) -> bytes:
+    """Read an uploaded image, raising 400 if its header is invalid"""
+    contents = await read_upload(file)
+    if validate_image(contents) is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid image format or corrupted image"
+        )
+    return contents
+
+async def run_posture_pipeline(
+    file: UploadFile,
+    draw_landmarks: bool,
+    session: Optional[PostureSession] = None,
+    inline_image: bool = True,
+    include_landmarks: bool = False
+) -> Dict:
+    """
+    Shared read -> validate -> analyze -> encode path of the posture endpoints
+    
+    Returns the full response dict; session, if given, is updated with the result
+    """
+    contents = await read_validated_upload(file)
+    
+    # Analyze posture
+    result, annotated_image_bytes = await analyze_upload(contents, draw_landmarks)
+    
+    response = {
+        "status": "success",
+        "posture_status": result.posture_status,
+        "posture_score": result.posture_score,
+        "is_good_posture": result.is_good_posture
+    }
+    
+    if inline_image:
+        # Convert image to base64
+        response["annotated_image"] = encode_image_base64(annotated_image_bytes)
+    else:
+        token = store_frame_image(annotated_image_bytes)
+        response["annotated_image_token"] = token
+        response["annotated_image_url"] = f"/posture/frame-image/{token}"
+    
+    # Update session
+    if session is not None:
+        session.update(result)
+        response["session_id"] = session.session_id
+        response["session_stats"] = session.get_statistics()
+    
+    # Add metrics if available (full precision; orjson formats floats natively)
+    if result.metrics:
+        response["metrics"] = {
+            "neck_angle": result.metrics.neck_angle,
+            "spine_tilt": result.metrics.spine_tilt,
+            "shoulder_tilt": result.metrics.shoulder_tilt,
+            "nose_shoulder_distance": result.metrics.nose_shoulder_dist
+        }
+    
+    # Add landmarks if requested and available
+    if include_landmarks and result.landmarks is not None:
+        response["landmarks"] = pack_landmarks(result.landmarks)
+    
+    return response
+
+def encode_image_base64(jpeg_bytes: bytes) -> str:
+    """
+    Base64-encode an annotated JPEG, reusing the string for repeated images
+    
+    analysis_cache hits hand back the same bytes object, whose hash is cached
+    by Python, so a repeated frame costs one dict lookup instead of an encode.
+    """
+    encoded = image_base64_cache.get(jpeg_bytes)
+    if encoded is not None:
+        image_base64_cache.move_to_end(jpeg_bytes)
+        return encoded
+    
+    encoded = to_base64(jpeg_bytes)
+    image_base64_cache[jpeg_bytes] = encoded
+    while len(image_base64_cache) > MAX_CACHED_IMAGE_BASE64:
+        image_base64_cache.popitem(last=False)
+    return encoded
+
+def pack_landmarks(landmarks: np.ndarray) -> Dict:
+    """Pack the (N, 4) landmark array into base64 little-endian float32 of x, y, z, visibility"""
+    arr = np.ascontiguousarray(landmarks, dtype='<f4')
+    return {
+        "format": "float32",
+        "shape": list(arr.shape),
+        "fields": ["x", "y", "z", "visibility"],
+        "data": to_base64(arr)
+    }
+
+@lru_cache(maxsize=256)
+def stream_metrics(neck_angle: float, spine_tilt: float, shoulder_tilt: float) -> Dict:
+    """
+    Metrics dict for the WebSocket stream, memoized on the rounded values
+    A held pose repeats the same rounded angles, so consecutive frames share one dict.
+    The returned dict is shared between callers and must not be mutated.
+    """
+    return {
+        "neck_angle": neck_angle,
+        "spine_tilt": spine_tilt,
+        "shoulder_tilt": shoulder_tilt
+    }
+
+async def send_json_fast(websocket: WebSocket, payload: Dict):
+    """Send a JSON text message, serialized with orjson instead of stdlib json"""
+    await websocket.send_text(orjson.dumps(payload).decode())
+
+def store_frame_image(jpeg_bytes: bytes) -> str:
+    """Keep an encoded frame for /posture/frame-image and return its token"""
+    token = uuid.uuid4().hex
+    frame_images[token] = jpeg_bytes
+    
+    # Evict the least recently used frames
+    while len(frame_images) > MAX_FRAME_IMAGES:
+        frame_images.popitem(last=False)
+        
+    return token
+
+@app.post("/analyze-pose")
+async def analyze_pose(file: UploadFile = File(...)):
+    try:
+        # Read and validate the uploaded file
+        contents = await read_validated_upload(file)
             
         # Process the image
         try:
-            keypoints, pose_name, annotated_image_bytes = get_pose_keypoints_and_annotated_image(contents)
+            keypoints, pose_name, annotated_image_bytes = await run_in_threadpool(
+                get_pose_keypoints_and_annotated_image, contents
+            )
         except Exception as e:
-            logger.error(f"Pose estimation error: {str(e)}\n{traceback.format_exc()}")
+            logger.error("Pose estimation error: %s", e, exc_info=True)
             raise HTTPException(
                 status_code=500,
                 detail=f"Error in pose estimation: {str(e)}"
@@ -93,9 +439,9 @@ async def analyze_pose(file: UploadFile = File(...)):
         
         # Convert annotated image to base64
         try:
-            annotated_image_base64 = base64.b64encode(annotated_image_bytes).decode('utf-8')
+            annotated_image_base64 = to_base64(annotated_image_bytes)
         except Exception as e:
-            logger.error(f"Base64 encoding error: {str(e)}")
+            logger.error("Base64 encoding error: %s", e)
             raise HTTPException(
                 status_code=500,
                 detail="Error encoding processed image"
@@ -111,7 +457,7 @@ async def analyze_pose(file: UploadFile = File(...)):
     except HTTPException as he:
         raise he
     except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}\n{traceback.format_exc()}")
+        logger.error("Unexpected error: %s", e, exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"Internal server error: {str(e)}"
@@ -121,6 +467,14 @@ async def analyze_pose(file: UploadFile = File(...)):
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/pose/landmark-names")
+async def landmark_names():
+    """
+    Names of the landmark rows in packed `landmarks` payloads, in row order
+    Static, so clients can fetch it once instead of receiving names with every frame
+    """
+    return {"landmark_names": LANDMARK_NAMES}
+
 
 # ==================== POSTURE ANALYSIS ENDPOINTS ====================
 
@@ -131,7 +485,7 @@ async def start_posture_session():
     Returns a session_id to use for subsequent frame analysis
     """
     try:
-        session_id = str(uuid.uuid4())
+        session_id = f"{_session_prefix}-{next(_session_counter):x}"
         active_sessions[session_id] = PostureSession(session_id)
         
         logger.info(f"Started posture session: {session_id}")
@@ -143,7 +497,7 @@ async def start_posture_session():
             "start_time": active_sessions[session_id].start_time.isoformat()
         }
     except Exception as e:
-        logger.error(f"Error starting posture session: {str(e)}")
+        logger.error("Error starting posture session: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -151,7 +505,9 @@ async def start_posture_session():
 async def analyze_posture_frame(
     session_id: str,
     file: UploadFile = File(...),
-    draw_landmarks: bool = True
+    draw_landmarks: bool = True,
+    inline_image: bool = True,
+    include_landmarks: bool = False
 ):
     """
     Analyze a single frame for posture
@@ -160,75 +516,59 @@ async def analyze_posture_frame(
     - session_id: Active session identifier
     - file: Image file to analyze
     - draw_landmarks: Whether to draw pose landmarks on returned image
+    - inline_image: Embed the annotated image as base64; when false, return a
+      token to fetch the binary JPEG from /posture/frame-image/{token}
+    - include_landmarks: Include landmarks as a packed float32 array
     
     Returns:
     - Posture analysis result with annotated image
     """
     try:
         # Check if session exists
-        if session_id not in active_sessions:
+        session = active_sessions.get(session_id)
+        if session is None:
             raise HTTPException(
                 status_code=404,
                 detail=f"Session {session_id} not found. Please start a session first."
             )
         
-        # Read and validate image
-        contents = await file.read()
-        image = validate_image(contents)
-        
-        if image is None:
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid image format or corrupted image"
-            )
-        
-        # Analyze posture
-        result = posture_analyzer.analyze_frame(image, draw_landmarks=draw_landmarks)
-        
-        # Update session
-        session = active_sessions[session_id]
-        session.update(result)
-        
-        # Draw posture info on image
-        annotated_image = posture_analyzer.draw_posture_info(image.copy(), result)
-        
-        # Convert image to base64
-        _, buffer = cv2.imencode('.jpg', annotated_image)
-        annotated_image_base64 = base64.b64encode(buffer).decode('utf-8')
-        
-        # Prepare response
-        response = {
-            "status": "success",
-            "session_id": session_id,
-            "posture_status": result.posture_status,
-            "posture_score": result.posture_score,
-            "is_good_posture": result.is_good_posture,
-            "annotated_image": annotated_image_base64,
-            "session_stats": session.get_statistics()
-        }
-        
-        # Add metrics if available
-        if result.metrics:
-            response["metrics"] = {
-                "neck_angle": round(result.metrics.neck_angle, 2),
-                "spine_tilt": round(result.metrics.spine_tilt, 2),
-                "shoulder_tilt": round(result.metrics.shoulder_tilt, 2),
-                "nose_shoulder_distance": round(result.metrics.nose_shoulder_dist, 2)
-            }
-        
-        # Add landmarks if available
-        if result.landmarks:
-            response["landmarks"] = result.landmarks
-        
-        return response
+        return await run_posture_pipeline(
+            file,
+            draw_landmarks,
+            session=session,
+            inline_image=inline_image,
+            include_landmarks=include_landmarks
+        )
         
     except HTTPException as he:
         raise he
     except Exception as e:
-        logger.error(f"Error analyzing posture frame: {str(e)}\n{traceback.format_exc()}")
+        logger.error("Error analyzing posture frame: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/posture/frame-image/{token}")
+async def get_frame_image(token: str):
+    """
+    Get an annotated frame as a binary JPEG
+    
+    Parameters:
+    - token: annotated_image_token returned by /posture/analyze-frame
+    
+    Returns:
+    - JPEG image
+    """
+    jpeg_bytes = frame_images.get(token)
+    if jpeg_bytes is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Frame image {token} not found or expired"
+        )
+    
+    frame_images.move_to_end(token)
+    return StreamingResponse(BytesIO(jpeg_bytes), media_type="image/jpeg")
+
+
 @app.post("/posture/end-session")
 async def end_posture_session(session_id: str):
     """
@@ -273,7 +613,7 @@ async def end_posture_session(session_id: str):
     except HTTPException as he:
         raise he
     except Exception as e:
-        logger.error(f"Error ending posture session: {str(e)}")
+        logger.error("Error ending posture session: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -308,7 +648,7 @@ async def get_session_status(session_id: str):
     except HTTPException as he:
         raise he
     except Exception as e:
-        logger.error(f"Error getting session status: {str(e)}")
+        logger.error("Error getting session status: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -333,7 +673,7 @@ async def get_posture_history(limit: int = 10):
         }
         
     except Exception as e:
-        logger.error(f"Error getting posture history: {str(e)}")
+        logger.error("Error getting posture history: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -354,7 +694,7 @@ async def get_overall_statistics():
         }
         
     except Exception as e:
-        logger.error(f"Error getting posture statistics: {str(e)}")
+        logger.error("Error getting posture statistics: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -382,7 +722,7 @@ async def get_active_sessions():
         }
         
     except Exception as e:
-        logger.error(f"Error getting active sessions: {str(e)}")
+        logger.error("Error getting active sessions: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -414,12 +754,16 @@ async def delete_posture_session(session_id: str):
     except HTTPException as he:
         raise he
     except Exception as e:
-        logger.error(f"Error deleting session: {str(e)}")
+        logger.error("Error deleting session: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/posture/quick-analyze")
-async def quick_posture_analyze(file: UploadFile = File(...), draw_landmarks: bool = True):
+async def quick_posture_analyze(
+    file: UploadFile = File(...),
+    draw_landmarks: bool = True,
+    include_landmarks: bool = False
+):
     """
     Quick posture analysis without session tracking
     Useful for single image analysis
@@ -427,71 +771,74 @@ async def quick_posture_analyze(file: UploadFile = File(...), draw_landmarks: bo
     Parameters:
     - file: Image file to analyze
     - draw_landmarks: Whether to draw pose landmarks
+    - include_landmarks: Include landmarks as a packed float32 array
     
     Returns:
     - Posture analysis result
     """
     try:
-        # Read and validate image
-        contents = await file.read()
-        image = validate_image(contents)
-        
-        if image is None:
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid image format or corrupted image"
-            )
-        
-        # Analyze posture
-        result = posture_analyzer.analyze_frame(image, draw_landmarks=draw_landmarks)
-        
-        # Draw posture info on image
-        annotated_image = posture_analyzer.draw_posture_info(image.copy(), result)
-        
-        # Convert image to base64
-        _, buffer = cv2.imencode('.jpg', annotated_image)
-        annotated_image_base64 = base64.b64encode(buffer).decode('utf-8')
-        
-        # Prepare response
-        response = {
-            "status": "success",
-            "posture_status": result.posture_status,
-            "posture_score": result.posture_score,
-            "is_good_posture": result.is_good_posture,
-            "annotated_image": annotated_image_base64
-        }
-        
-        # Add metrics if available
-        if result.metrics:
-            response["metrics"] = {
-                "neck_angle": round(result.metrics.neck_angle, 2),
-                "spine_tilt": round(result.metrics.spine_tilt, 2),
-                "shoulder_tilt": round(result.metrics.shoulder_tilt, 2),
-                "nose_shoulder_distance": round(result.metrics.nose_shoulder_dist, 2)
-            }
-        
-        return response
+        return await run_posture_pipeline(
+            file,
+            draw_landmarks,
+            include_landmarks=include_landmarks
+        )
         
     except HTTPException as he:
         raise he
     except Exception as e:
-        logger.error(f"Error in quick posture analysis: {str(e)}\n{traceback.format_exc()}")
+        logger.error("Error in quick posture analysis: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # ==================== WEBSOCKET FOR REAL-TIME VIDEO STREAMING ====================
 
+def decode_stream_frame(decoder: FrameDecoder, image_bytes: bytes):
+    """Decode a stream frame and its motion thumbnail: (image, frame_size, thumbnail)"""
+    image, frame_size = decoder.decode(image_bytes)
+    if image is None:
+        return None, None, None
+    return image, frame_size, motion_thumbnail(image)
+
+async def pump_messages(websocket: WebSocket, inbox: asyncio.Queue):
+    """Read client messages into inbox until the socket disconnects"""
+    try:
+        while True:
+            message = await websocket.receive()
+            text = message.get("text")
+            if text is not None:
+                # Parsed here so stale JSON frames can be recognized; bad JSON is reported by the handler
+                try:
+                    message["json"] = orjson.loads(text)
+                except orjson.JSONDecodeError:
+                    pass
+            inbox.put_nowait(message)
+            if message["type"] == "websocket.disconnect":
+                return
+    except Exception as e:
+        logger.error("WebSocket receive error: %s", e)
+        inbox.put_nowait({"type": "websocket.disconnect", "code": 1011})
+
+def is_frame_message(message: Dict) -> bool:
+    """Whether a raw WebSocket message carries a frame (binary tag 0 or JSON type "frame")"""
+    data = message.get("bytes")
+    if data is not None:
+        return data[:1] == b"\x00"
+    payload = message.get("json")
+    return isinstance(payload, dict) and payload.get("type") == "frame"
+
+
 @app.websocket("/ws/posture-stream/{session_id}")
 async def posture_stream_websocket(websocket: WebSocket, session_id: str):
     """
     WebSocket endpoint for real-time posture analysis
     
-    Client sends: Base64 encoded video frames
+    Client sends: Video frames as binary messages (or base64 in JSON)
     Server responds: Posture analysis results in real-time
     
     Protocol:
     1. Client connects with session_id
-    2. Client sends JSON: {"frame": "base64_image_data"}
+    2. Client sends binary: 1-byte type (0=frame, 1=ping, 2=end_session) + JPEG bytes for frames
+       or JSON: {"type": "frame", "frame": "base64_image_data"} / {"type": "ping"} / {"type": "end_session"}
     3. Server responds: {"status": "success", "posture_status": "...", "posture_score": 95, ...}
     4. Repeat for each frame
     """
@@ -506,118 +853,175 @@ async def posture_stream_websocket(websocket: WebSocket, session_id: str):
     active_websockets[session_id] = websocket
     session = active_sessions[session_id]
     
+    # Frames on this connection are handled one at a time, so decode into reused buffers
+    frame_decoder = FrameDecoder()
+    
+    # Messages are read in the background; when the client sends faster than frames
+    # are analyzed, only the newest queued frame is processed
+    inbox: asyncio.Queue = asyncio.Queue()
+    pending: deque = deque()
+    reader = asyncio.create_task(pump_messages(websocket, inbox))
+    
+    # Last analyzed frame, for motion gating
+    last_result: Optional[PostureResult] = None
+    last_thumbnail: Optional[np.ndarray] = None
+    frames_reused = 0
+    
     try:
         while True:
-            # Receive frame from client
-            data = await websocket.receive_text()
+            # Take the next binary or text message from client
+            if not pending:
+                pending.append(await inbox.get())
+            while not inbox.empty():
+                pending.append(inbox.get_nowait())
+            message = pending.popleft()
+            
+            # Skip frames superseded by a newer one (control messages are always handled)
+            if is_frame_message(message) and any(is_frame_message(m) for m in pending):
+                continue
+            
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
             
             try:
-                # Parse JSON
-                message = json.loads(data)
+                image_bytes = None
+                data = message.get("bytes")
+                
+                if data is not None:
+                    # Binary protocol: 1-byte type tag, then the raw JPEG for frames
+                    if not data:
+                        await send_json_fast(websocket, {
+                            "status": "error",
+                            "message": "Empty message"
+                        })
+                        continue
+                    message_type = WS_MESSAGE_TYPES.get(data[0])
+                    if message_type == "frame":
+                        image_bytes = data[1:]
+                else:
+                    # JSON protocol: {"type": "...", "frame": "base64_image_data"}
+                    payload = message["json"] if "json" in message else json.loads(message.get("text") or "")
+                    message_type = payload.get("type")
+                    if message_type == "frame":
+                        frame_base64 = payload.get("frame", "")
+                        if frame_base64:
+                            try:
+                                image_bytes = binascii.a2b_base64(frame_base64)
+                            except binascii.Error as e:
+                                await send_json_fast(websocket, {
+                                    "status": "error",
+                                    "message": f"Invalid base64 image: {str(e)}"
+                                })
+                                continue
                 
                 # Handle different message types
-                if message.get("type") == "frame":
-                    # Get base64 frame
-                    frame_base64 = message.get("frame", "")
-                    
-                    if not frame_base64:
-                        await websocket.send_json({
+                if message_type == "frame":
+                    if not image_bytes:
+                        await send_json_fast(websocket, {
                             "status": "error",
                             "message": "No frame data provided"
                         })
                         continue
                     
-                    # Decode base64 to image
+                    # Decode image
                     try:
-                        image_bytes = base64.b64decode(frame_base64)
-                        nparr = np.frombuffer(image_bytes, np.uint8)
-                        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+                        image, frame_size, thumbnail = await run_in_threadpool(
+                            decode_stream_frame, frame_decoder, image_bytes
+                        )
                         
                         if image is None:
-                            await websocket.send_json({
+                            await send_json_fast(websocket, {
                                 "status": "error",
                                 "message": "Failed to decode image"
                             })
                             continue
                         
                     except Exception as e:
-                        await websocket.send_json({
+                        await send_json_fast(websocket, {
                             "status": "error",
-                            "message": f"Invalid base64 image: {str(e)}"
+                            "message": f"Invalid image: {str(e)}"
                         })
                         continue
                     
-                    # Analyze posture
-                    result = posture_analyzer.analyze_frame(image, draw_landmarks=False)
+                    # Analyze posture, reusing the last result while the user holds still
+                    if (last_result is not None
+                            and frames_reused < MOTION_REVALIDATE_FRAMES
+                            and cv2.norm(thumbnail, last_thumbnail, cv2.NORM_L1) < MOTION_THRESHOLD * thumbnail.size):
+                        result = last_result
+                        frames_reused += 1
+                    else:
+                        result = await frame_batcher.analyze(image, False, frame_size)
+                        last_result, last_thumbnail, frames_reused = result, thumbnail, 0
                     
-                    # Update session
+                    # Update session and keep it from expiring while streaming
                     session.update(result)
+                    active_sessions.touch(session_id)
                     
                     # Prepare response
-                    response = {
-                        "status": "success",
-                        "posture_status": result.posture_status,
-                        "posture_score": result.posture_score,
-                        "is_good_posture": result.is_good_posture,
-                        "timestamp": datetime.now().isoformat()
-                    }
+                    response = StreamFrame(
+                        status="success",
+                        posture_status=result.posture_status,
+                        posture_score=result.posture_score,
+                        is_good_posture=result.is_good_posture,
+                        timestamp=current_iso
+                    )
                     
                     # Add metrics
                     if result.metrics:
-                        response["metrics"] = {
-                            "neck_angle": round(result.metrics.neck_angle, 2),
-                            "spine_tilt": round(result.metrics.spine_tilt, 2),
-                            "shoulder_tilt": round(result.metrics.shoulder_tilt, 2)
-                        }
+                        response.metrics = stream_metrics(
+                            round(result.metrics.neck_angle, 2),
+                            round(result.metrics.spine_tilt, 2),
+                            round(result.metrics.shoulder_tilt, 2)
+                        )
                     
                     # Add session stats (every 10 frames to reduce data)
                     if session.total_frames % 10 == 0:
-                        response["session_stats"] = {
+                        response.session_stats = {
                             "total_frames": session.total_frames,
                             "good_percent": round((session.good_frames / session.total_frames * 100), 2) if session.total_frames > 0 else 0,
                             "bad_percent": round((session.bad_frames / session.total_frames * 100), 2) if session.total_frames > 0 else 0,
-                            "average_score": round(sum(session.score_history) / len(session.score_history), 2) if session.score_history else 0,
+                            "average_score": round(session.average_score(), 2),
                             "current_bad_duration": round(session.current_bad_duration, 2)
                         }
                     
                     # Send response back to client
-                    await websocket.send_json(response)
+                    await websocket.send_text(stream_encoder.encode(response).decode())
                 
-                elif message.get("type") == "ping":
+                elif message_type == "ping":
                     # Heartbeat
-                    await websocket.send_json({"type": "pong"})
+                    await send_json_fast(websocket, {"type": "pong"})
                 
-                elif message.get("type") == "end_session":
+                elif message_type == "end_session":
                     # End session and save
                     stats = session.get_statistics()
                     stats['end_time'] = datetime.now().isoformat()
                     posture_db.save_session(stats)
                     
-                    await websocket.send_json({
+                    await send_json_fast(websocket, {
                         "status": "success",
                         "message": "Session ended and saved",
                         "final_stats": stats
                     })
                     
                     # Clean up
-                    del active_sessions[session_id]
+                    active_sessions.pop(session_id)
                     break
                 
                 else:
-                    await websocket.send_json({
+                    await send_json_fast(websocket, {
                         "status": "error",
                         "message": "Unknown message type"
                     })
             
             except json.JSONDecodeError:
-                await websocket.send_json({
+                await send_json_fast(websocket, {
                     "status": "error",
                     "message": "Invalid JSON format"
                 })
             
             except Exception as e:
-                logger.error(f"Error processing frame: {str(e)}\n{traceback.format_exc()}")
-                await websocket.send_json({
+                logger.error("Error processing frame: %s", e, exc_info=True)
+                await send_json_fast(websocket, {
                     "status": "error",
                     "message": f"Error processing frame: {str(e)}"
                 })
@@ -626,26 +1030,22 @@ async def posture_stream_websocket(websocket: WebSocket, session_id: str):
         logger.info(f"WebSocket disconnected for session: {session_id}")
         # Save session on disconnect
         if session_id in active_sessions:
-            stats = active_sessions[session_id].get_statistics()
+            stats = active_sessions.pop(session_id).get_statistics()
             stats['end_time'] = datetime.now().isoformat()
             posture_db.save_session(stats)
-            del active_sessions[session_id]
     
     except Exception as e:
-        logger.error(f"WebSocket error: {str(e)}\n{traceback.format_exc()}")
+        logger.error("WebSocket error: %s", e, exc_info=True)
     
     finally:
         # Clean up
+        reader.cancel()
         if session_id in active_websockets:
             del active_websockets[session_id]
 
 
-@app.get("/posture/ws-test")
-async def websocket_test_page():
-    """
-    Simple HTML page to test WebSocket connection
-    """
-    html_content = """
+# Static page for /posture/ws-test, built once at import
+WS_TEST_HTML = """
     <!DOCTYPE html>
     <html>
     <head>
@@ -715,11 +1115,16 @@ async def websocket_test_page():
     </body>
     </html>
     """
-    from fastapi.responses import HTMLResponse
-    return HTMLResponse(content=html_content)
+
+
+@app.get("/posture/ws-test")
+async def websocket_test_page():
+    """
+    Simple HTML page to test WebSocket connection
+    """
+    return HTMLResponse(content=WS_TEST_HTML)
 
 
 if __name__ == "__main__":
-    import os
     PORT = int(os.getenv("PORT", 8000))
     uvicorn.run(app, host="0.0.0.0", port=PORT)
@@ -0,0 +1,112 @@
+"""
+Coalesce concurrent posture analysis requests
+Frames queued while the analyzer is busy are processed together in one
+threadpool hop instead of one dispatch (and pool round-trip) per request;
+up to analyzer.pool_size batches run at once. MediaPipe has no batched
+forward pass, so a batch runs frame by frame and each frame's result is
+delivered as soon as it is ready rather than when the whole batch ends
+"""
+
+import asyncio
+from typing import List, Optional, Set, Tuple
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+
+from posture_analysis import PostureAnalyzer, PostureResult
+
+MAX_BATCH = 8
+
+
+class FrameBatcher:
+    """Feed queued frames to a shared PostureAnalyzer in small batches"""
+
+    def __init__(self, analyzer: PostureAnalyzer, max_batch: int = MAX_BATCH):
+        """Initialize the batcher; call start() from a running event loop"""
+        self.analyzer = analyzer
+        self.max_batch = max_batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._task: Optional[asyncio.Task] = None
+        self._batches: Set[asyncio.Task] = set()
+        # Batches holding a pose graph (a slot) right now
+        self._running = 0
+
+    def start(self):
+        """Start the background task that drains the queue"""
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.analyzer.pool_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background task and any batches in flight"""
+        for batch_task in list(self._batches):
+            batch_task.cancel()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def analyze(self, frame: np.ndarray, draw_landmarks: bool = False,
+                      frame_size: Optional[Tuple[int, int]] = None,
+                      return_landmarks: bool = False) -> PostureResult:
+        """Queue a frame for analysis and wait for its result"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((frame, draw_landmarks, frame_size, return_landmarks, future))
+        return await future
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, result: Optional[PostureResult], error: Optional[Exception]):
+        """Complete a frame's future unless its caller has gone away"""
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _analyze_batch(self, batch: List[Tuple], loop: asyncio.AbstractEventLoop):
+        """Analyze a batch in order, resolving each frame's future as soon as it is done"""
+        for frame, draw_landmarks, frame_size, return_landmarks, future in batch:
+            try:
+                result = self.analyzer.analyze_frame(frame, draw_landmarks, frame_size, return_landmarks)
+                loop.call_soon_threadsafe(self._resolve, future, result, None)
+            except Exception as e:
+                loop.call_soon_threadsafe(self._resolve, future, None, e)
+
+    async def _run(self):
+        """Once a pose graph is free, take its share of the queue as one batch"""
+        while True:
+            await self._slots.acquire()
+            try:
+                batch = [await self._queue.get()]
+            except BaseException:
+                self._slots.release()
+                raise
+
+            # Split what is queued evenly over the free graphs, so one graph
+            # doesn't take the whole queue while others sit idle
+            free_graphs = self.analyzer.pool_size - self._running
+            queued = len(batch) + self._queue.qsize()
+            limit = min(self.max_batch, -(-queued // free_graphs))
+            while len(batch) < limit and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            self._running += 1
+            batch_task = asyncio.create_task(self._dispatch(batch))
+            self._batches.add(batch_task)
+            batch_task.add_done_callback(self._batches.discard)
+
+    async def _dispatch(self, batch: List[Tuple]):
+        """Analyze one batch in the threadpool"""
+        try:
+            await run_in_threadpool(self._analyze_batch, batch, asyncio.get_running_loop())
+        except Exception as e:
+            for *_, future in batch:
+                self._resolve(future, None, e)
+        finally:
+            self._running -= 1
+            self._slots.release()
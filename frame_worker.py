@@ -0,0 +1,34 @@
+"""
+Posture pipeline for ProcessPoolExecutor workers
+Each worker process owns its own PostureAnalyzer, so decode, inference,
+drawing and encoding run outside the API process and its GIL
+"""
+
+from typing import Optional, Tuple
+
+from posture_analysis import PostureAnalyzer, PostureResult, apply_draw_ops
+from utils import read_image_for_pose, image_to_bytes
+
+_analyzer: Optional[PostureAnalyzer] = None
+
+
+def init_worker(model_complexity: int = 1):
+    """Create this worker's analyzer (ProcessPoolExecutor initializer)"""
+    global _analyzer
+    _analyzer = PostureAnalyzer(model_complexity=model_complexity)
+
+
+def process_frame(contents: bytes, draw_landmarks: bool) -> Optional[Tuple[PostureResult, bytes]]:
+    """
+    Decode, analyze, annotate and encode one uploaded image
+
+    Returns:
+        (PostureResult, annotated JPEG bytes), or None if the image can't be decoded
+    """
+    image, frame_size = read_image_for_pose(contents)
+    if image is None:
+        return None
+
+    result = _analyzer.analyze_frame(image, draw_landmarks, frame_size, return_landmarks=True)
+    annotated_image = apply_draw_ops(image, _analyzer.get_draw_ops(result))
+    return result, image_to_bytes(annotated_image)
@@ -1,7 +1,9 @@
 import mediapipe as mp
 import cv2
 import numpy as np
-from utils import read_image_from_bytes
+import threading
+from posture_analysis import LANDMARK_NAMES
+from utils import read_image_for_pose, image_to_bytes
 
 mp_pose = mp.solutions.pose
 mp_drawing = mp.solutions.drawing_utils
@@ -12,6 +14,18 @@ pose = mp_pose.Pose(
     model_complexity=2,
     min_detection_confidence=0.5
 )
+# The shared Pose graph is not thread-safe; serialize inference calls
+pose_lock = threading.Lock()
+
+# Per-thread RGB scratch frame, reused while the input shape stays the same
+_tls = threading.local()
+
+def to_rgb(image):
+    """Convert a BGR frame to RGB in this thread's reusable scratch buffer"""
+    buf = getattr(_tls, 'rgb_buf', None)
+    if buf is None or buf.shape != image.shape:
+        buf = _tls.rgb_buf = np.empty_like(image)
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=buf)
 
 def calculate_angle(a, b, c):
     a, b, c = np.array(a), np.array(b), np.array(c)
@@ -82,18 +96,21 @@ def detect_pose(landmarks):
 
 def get_pose_keypoints_and_annotated_image(image_bytes):
     try:
-        image = read_image_from_bytes(image_bytes)
+        # Landmarks are normalized, so keypoints are unaffected by the downscale
+        image, _ = read_image_for_pose(image_bytes)
         if image is None:
             raise ValueError("Failed to read image from bytes")
             
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        results = pose.process(image_rgb)
+        image_rgb = to_rgb(image)
+        with pose_lock:
+            results = pose.process(image_rgb)
 
         if not results.pose_landmarks:
-            return [], "No pose detected", image
+            # Callers expect encoded bytes, not the raw frame
+            return [], "No pose detected", image_to_bytes(image)
 
-        # Draw pose landmarks on the image
-        annotated_image = image.copy()
+        # Draw pose landmarks on the image (in place, the original is not reused)
+        annotated_image = image
         
         # Draw landmarks with custom style (fix: do not use get_default_pose_connections_style)
         mp_drawing.draw_landmarks(
@@ -121,13 +138,12 @@ def get_pose_keypoints_and_annotated_image(image_bytes):
         )
 
         # Convert annotated image to bytes
-        _, buffer = cv2.imencode('.jpg', annotated_image)
-        annotated_image_bytes = buffer.tobytes()
+        annotated_image_bytes = image_to_bytes(annotated_image)
 
         # Extract keypoints
         keypoints = [{
             "index": idx,
-            "name": mp_pose.PoseLandmark(idx).name,
+            "name": LANDMARK_NAMES[idx],
             "x": lm.x,
             "y": lm.y,
             "z": lm.z,
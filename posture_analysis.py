@@ -6,14 +6,18 @@ Adapted from standalone posture.py for API usage
 import cv2
 import mediapipe as mp
 import math
+import queue
+import time
 import numpy as np
+from collections import deque
 from typing import Dict, Tuple, Optional, List
 from dataclasses import dataclass
 from datetime import datetime
 
+from posture_kernels import analyze_points
+
 # MediaPipe Pose Setup
 mp_pose = mp.solutions.pose
-mp_drawing = mp.solutions.drawing_utils
 
 # Posture Thresholds
 NECK_ANGLE_THRESH = 175
@@ -22,6 +26,111 @@ SHOULDER_TILT_THRESH = 25
 LEAN_THRESHOLD = 30
 HEAD_DROP_THRESH = 60
 
+# Landmark names by index, for serializing results
+LANDMARK_NAMES = tuple(landmark.name for landmark in mp_pose.PoseLandmark)
+
+# Longest side of the frame passed to MediaPipe; its models run at 256x256 or less
+INFERENCE_MAX_SIDE = 480
+
+# Landmarks used for posture metrics, in extract_keypoints order
+KEYPOINT_INDICES = np.array([
+    mp_pose.PoseLandmark.NOSE,
+    mp_pose.PoseLandmark.LEFT_SHOULDER,
+    mp_pose.PoseLandmark.RIGHT_SHOULDER,
+    mp_pose.PoseLandmark.LEFT_HIP,
+    mp_pose.PoseLandmark.RIGHT_HIP,
+], dtype=np.intp)
+
+# Threshold vector for the compiled posture kernel
+POSTURE_THRESHOLDS = np.array(
+    [NECK_ANGLE_THRESH, SPINE_TILT_THRESH, SHOULDER_TILT_THRESH, LEAN_THRESHOLD, HEAD_DROP_THRESH],
+    dtype=np.float64
+)
+
+# (status, BGR color) per posture class, in classify_posture's branch order
+POSTURE_CLASSES = (
+    ("Severely Slouched", (0, 0, 255)),
+    ("Slightly Slouched", (0, 165, 255)),
+    ("Leaning Forward", (0, 165, 255)),
+    ("Leaning Backward", (0, 165, 255)),
+    ("Severe Lean Left", (0, 165, 255)),
+    ("Severe Lean Right", (0, 165, 255)),
+    ("Leaning Left", (0, 165, 255)),
+    ("Leaning Right", (0, 165, 255)),
+    ("Good Posture", (0, 255, 0)),
+    ("Bad Posture", (0, 0, 255)),
+)
+
+# Recent scores and statuses kept per session (~10 s at 30 fps)
+SCORE_HISTORY_SIZE = 300
+
+# Skeleton edges as (start, end) landmark index pairs, for draw_overlay
+POSE_CONNECTIONS = np.array(sorted(mp_pose.POSE_CONNECTIONS), dtype=np.intp)
+
+# Landmarks less visible or present than this are left off the overlay (as mp_drawing does)
+OVERLAY_VISIBILITY_THRESHOLD = 0.5
+OVERLAY_PRESENCE_THRESHOLD = 0.5
+
+# Overlay drawing specs, as previously passed to mp_drawing.draw_landmarks (BGR)
+OVERLAY_EDGE_COLOR = (0, 0, 255)
+OVERLAY_JOINT_COLOR = (0, 255, 0)
+OVERLAY_JOINT_BORDER_COLOR = (224, 224, 224)
+OVERLAY_THICKNESS = 2
+OVERLAY_JOINT_RADIUS = 2
+# mp_drawing's border ring: max(radius + 1, int(radius * 1.2))
+OVERLAY_JOINT_BORDER_RADIUS = max(OVERLAY_JOINT_RADIUS + 1, int(OVERLAY_JOINT_RADIUS * 1.2))
+
+
+def _draw_text(frame: np.ndarray, org, text: str, font_scale: float, color, thickness: int):
+    cv2.putText(frame, text, org, cv2.FONT_HERSHEY_SIMPLEX, font_scale, color, thickness)
+
+
+_DRAW_OPS = {
+    'text': _draw_text,
+}
+
+
+def apply_draw_ops(frame: np.ndarray, ops: List[Tuple]) -> np.ndarray:
+    """Apply drawing primitives from PostureAnalyzer.get_draw_ops to frame in place"""
+    for op in ops:
+        _DRAW_OPS[op[0]](frame, *op[1:])
+    return frame
+
+
+def draw_overlay(frame: np.ndarray, landmarks: np.ndarray,
+                 presence: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Draw the pose skeleton from a (33, 4) landmark array onto frame in place
+    
+    Draws what mp_drawing.draw_landmarks drew with the overlay specs above:
+    edges first, then each joint as a border ring and a filled circle. Joint
+    filtering and pixel conversion run as array ops instead of per landmark.
+    
+    Args:
+        landmarks: (33, 4) float32 x, y, z, visibility
+        presence: Optional per-landmark presence scores; landmarks below
+            OVERLAY_PRESENCE_THRESHOLD are skipped like low-visibility ones
+    """
+    height, width = frame.shape[:2]
+    xy = landmarks[:, :2].astype(np.float64)
+    shown = landmarks[:, 3] >= OVERLAY_VISIBILITY_THRESHOLD
+    if presence is not None:
+        shown &= presence >= OVERLAY_PRESENCE_THRESHOLD
+    # Only points inside the frame, with 1.0 allowed up to float tolerance
+    shown &= ((xy >= 0) & ((xy <= 1) | np.isclose(xy, 1, rtol=1e-9, atol=0))).all(axis=1)
+    
+    # Pixel coordinates floored and clamped to the last row/column, as mp_drawing does
+    points = np.minimum(np.floor(xy * (width, height)), (width - 1, height - 1)).astype(np.int32).tolist()
+    
+    for start, end in POSE_CONNECTIONS[shown[POSE_CONNECTIONS].all(axis=1)].tolist():
+        cv2.line(frame, tuple(points[start]), tuple(points[end]),
+                 OVERLAY_EDGE_COLOR, OVERLAY_THICKNESS)
+    for index in np.flatnonzero(shown).tolist():
+        center = tuple(points[index])
+        cv2.circle(frame, center, OVERLAY_JOINT_BORDER_RADIUS, OVERLAY_JOINT_BORDER_COLOR, OVERLAY_THICKNESS)
+        cv2.circle(frame, center, OVERLAY_JOINT_RADIUS, OVERLAY_JOINT_COLOR, OVERLAY_THICKNESS)
+    return frame
+
 
 @dataclass
 class PostureMetrics:
@@ -43,7 +152,7 @@ class PostureResult:
     posture_score: int  # 0-100
     color: Tuple[int, int, int]  # BGR color for display
     metrics: PostureMetrics
-    landmarks: Optional[List[Dict]] = None
+    landmarks: Optional[np.ndarray] = None  # (33, 4) float32: x, y, z, visibility
     is_good_posture: bool = False
 
 
@@ -52,82 +161,60 @@ class PostureAnalyzer:
     
     def __init__(self, 
                  min_detection_confidence: float = 0.5,
-                 min_tracking_confidence: float = 0.5):
-        """Initialize the posture analyzer"""
-        self.pose = mp_pose.Pose(
-            static_image_mode=False,
-            min_detection_confidence=min_detection_confidence,
-            min_tracking_confidence=min_tracking_confidence
-        )
+                 min_tracking_confidence: float = 0.5,
+                 model_complexity: int = 1,
+                 pool_size: int = 1):
+        """
+        Initialize the posture analyzer
+        
+        Args:
+            model_complexity: MediaPipe pose model variant, 0 (lite, fastest),
+                1 (full) or 2 (heavy, most accurate)
+            pool_size: Number of pose graphs, i.e. how many frames can be
+                analyzed concurrently (each graph holds its own model)
+        """
+        # MediaPipe graphs are not thread-safe; each call checks one out of the pool
+        self.pool_size = pool_size
+        self._pose_pool: "queue.Queue" = queue.Queue()
+        for _ in range(pool_size):
+            self._pose_pool.put(mp_pose.Pose(
+                static_image_mode=False,
+                model_complexity=model_complexity,
+                min_detection_confidence=min_detection_confidence,
+                min_tracking_confidence=min_tracking_confidence
+            ))
+        # Reusable RGB scratch buffer per pose graph, keyed by id(pose)
+        self._rgb_bufs: Dict[int, np.ndarray] = {}
         
     def calculate_angle(self, a: Tuple, b: Tuple, c: Tuple) -> float:
         """Calculate angle between three points"""
         ba = (a[0] - b[0], a[1] - b[1])
         bc = (c[0] - b[0], c[1] - b[1])
         
+        # atan2(|cross|, dot) needs no normalization or clamping and is 0 for zero-length vectors
+        cross = ba[0] * bc[1] - ba[1] * bc[0]
         dot_product = ba[0] * bc[0] + ba[1] * bc[1]
-        mag_ba = math.sqrt(ba[0] ** 2 + ba[1] ** 2)
-        mag_bc = math.sqrt(bc[0] ** 2 + bc[1] ** 2)
         
-        if mag_ba * mag_bc == 0:
-            return 0
-        
-        cos_val = dot_product / (mag_ba * mag_bc)
-        cos_val = max(-1.0, min(1.0, cos_val))
-        angle = math.acos(cos_val)
-        
-        return math.degrees(angle)
+        return abs(math.degrees(math.atan2(cross, dot_product)))
     
     def compute_posture_score(self, neck_angle: float, spine_tilt: float, shoulder_tilt: float) -> int:
         """Compute overall posture score (0-100)"""
-        score = 100.0
-        score -= abs(NECK_ANGLE_THRESH - neck_angle) * 0.4
-        score -= spine_tilt * 0.4
-        score -= shoulder_tilt * 0.4
-        score = max(0, min(100, int(score)))
-        return score
+        # All three deviations share one weight, so apply it to their sum
+        penalty = abs(NECK_ANGLE_THRESH - neck_angle) + spine_tilt + shoulder_tilt
+        return max(0, min(100, int(100.0 - 0.4 * penalty)))
     
-    def extract_keypoints(self, landmarks, width: int, height: int) -> Dict:
-        """Extract key body points from MediaPipe landmarks"""
-        lm = landmarks.landmark
-        
-        # Shoulders
-        left_shoulder = (
-            int(lm[mp_pose.PoseLandmark.LEFT_SHOULDER].x * width),
-            int(lm[mp_pose.PoseLandmark.LEFT_SHOULDER].y * height)
-        )
-        right_shoulder = (
-            int(lm[mp_pose.PoseLandmark.RIGHT_SHOULDER].x * width),
-            int(lm[mp_pose.PoseLandmark.RIGHT_SHOULDER].y * height)
-        )
-        
-        # Neck (midpoint between shoulders)
-        neck = (
-            (left_shoulder[0] + right_shoulder[0]) // 2,
-            (left_shoulder[1] + right_shoulder[1]) // 2
-        )
-        
-        # Hips
-        left_hip = (
-            int(lm[mp_pose.PoseLandmark.LEFT_HIP].x * width),
-            int(lm[mp_pose.PoseLandmark.LEFT_HIP].y * height)
-        )
-        right_hip = (
-            int(lm[mp_pose.PoseLandmark.RIGHT_HIP].x * width),
-            int(lm[mp_pose.PoseLandmark.RIGHT_HIP].y * height)
-        )
+    def extract_keypoints(self, landmarks: np.ndarray, width: int, height: int) -> Dict:
+        """Extract key body points from the (33, 4) landmark array"""
+        # Scale nose, shoulders and hips to pixels in one pass (truncated like int())
+        points = landmarks[KEYPOINT_INDICES, :2].astype(np.float64)
+        points = (points * (width, height)).astype(np.int64)
         
-        # Mid hip
-        mid_hip = (
-            (left_hip[0] + right_hip[0]) // 2,
-            (left_hip[1] + right_hip[1]) // 2
-        )
+        # Neck and mid hip: midpoints of the shoulders and of the hips
+        # (arithmetic shift floors like // 2, negatives included)
+        midpoints = (points[[1, 3]] + points[[2, 4]]) >> 1
         
-        # Nose
-        nose = (
-            int(lm[mp_pose.PoseLandmark.NOSE].x * width),
-            int(lm[mp_pose.PoseLandmark.NOSE].y * height)
-        )
+        nose, left_shoulder, right_shoulder, left_hip, right_hip = map(tuple, points.tolist())
+        neck, mid_hip = map(tuple, midpoints.tolist())
         
         return {
             'left_shoulder': left_shoulder,
@@ -167,64 +254,88 @@ class PostureAnalyzer:
     
     def classify_posture(self, metrics: PostureMetrics) -> Tuple[str, Tuple[int, int, int]]:
         """Classify posture based on metrics"""
+        # Head offsets from the shoulder midpoint, computed once for every check
+        dy_head = metrics.nose_y - metrics.shoulder_y_avg
+        dx_nose = metrics.nose_x - metrics.shoulder_mid_x
+        nose_shoulder_dist = metrics.nose_shoulder_dist
+        
         # Severely Slouched
-        if metrics.nose_y > metrics.shoulder_y_avg + HEAD_DROP_THRESH:
-            return "Severely Slouched", (0, 0, 255)
+        if dy_head > HEAD_DROP_THRESH:
+            return POSTURE_CLASSES[0]
         
         # Slightly Slouched
-        elif metrics.nose_y > metrics.shoulder_y_avg + HEAD_DROP_THRESH // 2:
-            return "Slightly Slouched", (0, 165, 255)
+        if dy_head > HEAD_DROP_THRESH // 2:
+            return POSTURE_CLASSES[1]
         
         # Leaning Forward
-        elif metrics.nose_shoulder_dist < 140:
-            return "Leaning Forward", (0, 165, 255)
+        if nose_shoulder_dist < 140:
+            return POSTURE_CLASSES[2]
         
         # Leaning Backward
-        elif metrics.nose_shoulder_dist > 200:
-            return "Leaning Backward", (0, 165, 255)
-        
-        # Severe Lean Right
-        elif metrics.nose_x > metrics.shoulder_mid_x + (LEAN_THRESHOLD * 2.4):
-            return "Severe Lean Left", (0, 165, 255)
-        
-        # Severe Lean Left
-        elif metrics.nose_x < metrics.shoulder_mid_x - (LEAN_THRESHOLD * 2.4):
-            return "Severe Lean Right", (0, 165, 255)
+        if nose_shoulder_dist > 200:
+            return POSTURE_CLASSES[3]
         
-        # Leaning Right
-        elif metrics.nose_x > metrics.shoulder_mid_x + (LEAN_THRESHOLD * 0.5):
-            return "Leaning Left", (0, 165, 255)
+        # Severe Lean Left / Right
+        if dx_nose > LEAN_THRESHOLD * 2.4:
+            return POSTURE_CLASSES[4]
+        if dx_nose < -LEAN_THRESHOLD * 2.4:
+            return POSTURE_CLASSES[5]
         
-        # Leaning Left
-        elif metrics.nose_x < metrics.shoulder_mid_x - (LEAN_THRESHOLD * 0.5):
-            return "Leaning Right", (0, 165, 255)
+        # Leaning Left / Right
+        if dx_nose > LEAN_THRESHOLD * 0.5:
+            return POSTURE_CLASSES[6]
+        if dx_nose < -LEAN_THRESHOLD * 0.5:
+            return POSTURE_CLASSES[7]
         
         # Good Posture
-        elif (metrics.neck_angle >= NECK_ANGLE_THRESH - 3 and
-              metrics.spine_tilt <= SPINE_TILT_THRESH + 3 and
-              metrics.shoulder_tilt <= SHOULDER_TILT_THRESH + 3):
-            return "Good Posture", (0, 255, 0)
+        if (metrics.neck_angle >= NECK_ANGLE_THRESH - 3 and
+                metrics.spine_tilt <= SPINE_TILT_THRESH + 3 and
+                metrics.shoulder_tilt <= SHOULDER_TILT_THRESH + 3):
+            return POSTURE_CLASSES[8]
         
         # Bad Posture (default)
-        else:
-            return "Bad Posture", (0, 0, 255)
+        return POSTURE_CLASSES[9]
     
-    def analyze_frame(self, frame: np.ndarray, draw_landmarks: bool = True) -> PostureResult:
+    def analyze_frame(self, frame: np.ndarray, draw_landmarks: bool = False,
+                      frame_size: Optional[Tuple[int, int]] = None,
+                      return_landmarks: bool = False) -> PostureResult:
         """
         Analyze a single frame for posture
         
         Args:
             frame: Input image (BGR format)
-            draw_landmarks: Whether to draw pose landmarks on the frame
+            draw_landmarks: Whether to draw pose landmarks on the frame; off by
+                default, since headless clients can render from result.landmarks
+            frame_size: (width, height) of the original image if frame was
+                downscaled; metrics are measured in these pixel units
+            return_landmarks: Whether to include all landmarks in the result
             
         Returns:
             PostureResult object with analysis results
         """
-        # Convert to RGB
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        
-        # Process frame
-        results = self.pose.process(rgb_frame)
+        # Downscale before the color conversion; landmarks are normalized, so they
+        # still map onto the full frame for drawing and metrics
+        scale = INFERENCE_MAX_SIDE / max(frame.shape[:2])
+        if scale < 1:
+            small = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        else:
+            small = frame
+        
+        # Convert to RGB. A reversed channel slice is single-threaded, unlike cvtColor,
+        # which fans out across all cores: slightly slower per call, but cheaper in total
+        # CPU when several requests run in the threadpool at once. The result goes into
+        # the checked-out graph's scratch buffer, so steady state allocates nothing here
+        pose = self._pose_pool.get()
+        try:
+            rgb_frame = self._rgb_bufs.get(id(pose))
+            if rgb_frame is None or rgb_frame.shape != small.shape:
+                rgb_frame = self._rgb_bufs[id(pose)] = np.empty_like(small)
+            np.copyto(rgb_frame, small[..., ::-1])
+            
+            # Process frame
+            results = pose.process(rgb_frame)
+        finally:
+            self._pose_pool.put(pose)
         
         # No person detected
         if not results.pose_landmarks:
@@ -236,117 +347,116 @@ class PostureAnalyzer:
                 is_good_posture=False
             )
         
+        # All landmarks as one float32 array, rows in landmark index order
+        landmarks = np.array([
+            (lm.x, lm.y, lm.z, lm.visibility) for lm in results.pose_landmarks.landmark
+        ], dtype=np.float32)
+        
         # Draw landmarks if requested
         if draw_landmarks:
-            mp_drawing.draw_landmarks(
-                frame,
-                results.pose_landmarks,
-                mp_pose.POSE_CONNECTIONS,
-                mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2),
-                mp_drawing.DrawingSpec(color=(0, 0, 255), thickness=2)
-            )
+            presence = np.array([
+                lm.presence if lm.HasField('presence') else 1.0
+                for lm in results.pose_landmarks.landmark
+            ])
+            draw_overlay(frame, landmarks, presence)
         
         # Extract keypoints
-        height, width, _ = frame.shape
-        keypoints = self.extract_keypoints(results.pose_landmarks, width, height)
-        
-        # Calculate metrics
-        metrics = self.calculate_metrics(keypoints)
-        
-        # Classify posture
-        posture_status, color = self.classify_posture(metrics)
-        
-        # Calculate score
-        posture_score = self.compute_posture_score(
-            metrics.neck_angle,
-            metrics.spine_tilt,
-            metrics.shoulder_tilt
-        )
+        if frame_size is not None:
+            width, height = frame_size
+        else:
+            height, width, _ = frame.shape
+        if analyze_points is not None:
+            # Keypoints, metrics, classification and score in one compiled call
+            points = landmarks[KEYPOINT_INDICES, :2].astype(np.float64)
+            *values, status_code, posture_score = analyze_points(points, width, height, POSTURE_THRESHOLDS)
+            metrics = PostureMetrics(*values)
+            posture_status, color = POSTURE_CLASSES[status_code]
+        else:
+            keypoints = self.extract_keypoints(landmarks, width, height)
+            
+            # Calculate metrics
+            metrics = self.calculate_metrics(keypoints)
+            
+            # Classify posture
+            posture_status, color = self.classify_posture(metrics)
+            
+            # Calculate score
+            posture_score = self.compute_posture_score(
+                metrics.neck_angle,
+                metrics.spine_tilt,
+                metrics.shoulder_tilt
+            )
         
         # Check if good posture
         is_good = "Good" in posture_status
         
-        # Extract landmarks for response
-        landmarks_list = [{
-            "index": idx,
-            "name": mp_pose.PoseLandmark(idx).name,
-            "x": lm.x,
-            "y": lm.y,
-            "z": lm.z,
-            "visibility": lm.visibility
-        } for idx, lm in enumerate(results.pose_landmarks.landmark)]
-        
         return PostureResult(
             posture_status=posture_status,
             posture_score=posture_score,
             color=color,
             metrics=metrics,
-            landmarks=landmarks_list,
+            landmarks=landmarks if return_landmarks else None,
             is_good_posture=is_good
         )
     
-    def draw_posture_info(self, frame: np.ndarray, result: PostureResult) -> np.ndarray:
-        """Draw posture information on the frame"""
-        if result.metrics is None:
-            cv2.putText(
-                frame,
-                result.posture_status,
-                (30, 30),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                1,
-                result.color,
-                2
-            )
-            return frame
-        
-        # Draw posture status
-        cv2.putText(
-            frame,
-            f"Posture: {result.posture_status}",
-            (30, 30),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            1,
-            result.color,
-            2
-        )
-        
-        # Draw score
-        cv2.putText(
-            frame,
-            f"Score: {result.posture_score}",
-            (30, 70),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.8,
-            (255, 0, 0),
-            2
-        )
+    def get_draw_ops(self, result: PostureResult) -> List[Tuple]:
+        """
+        Describe the posture overlay as drawing primitives
         
-        return frame
+        Returns:
+            List of ('text', org, text, font_scale, color, thickness)
+            tuples for apply_draw_ops
+        """
+        if result.metrics is None:
+            return [('text', (30, 30), result.posture_status, 1, result.color, 2)]
+        
+        return [
+            # Posture status
+            ('text', (30, 30), f"Posture: {result.posture_status}", 1, result.color, 2),
+            # Score
+            ('text', (30, 70), f"Score: {result.posture_score}", 0.8, (255, 0, 0), 2)
+        ]
+    
+    def draw_posture_info(self, frame: np.ndarray, result: PostureResult) -> np.ndarray:
+        """Draw posture information on the frame in place and return it"""
+        return apply_draw_ops(frame, self.get_draw_ops(result))
     
     def close(self):
         """Release resources"""
-        self.pose.close()
+        for _ in range(self.pool_size):
+            self._pose_pool.get().close()
 
 
 # Session storage for tracking posture sessions
 class PostureSession:
     """Track a single posture analysis session"""
     
+    __slots__ = (
+        'session_id', 'start_time', 'start_monotonic', 'total_frames', 'good_frames', 'bad_frames',
+        'current_bad_duration', 'longest_bad_duration', 'bad_posture_start',
+        'score_sum', 'posture_history'
+    )
+    
     def __init__(self, session_id: str):
         self.session_id = session_id
         self.start_time = datetime.now()
+        # Durations use the monotonic clock; start_time is only reported
+        self.start_monotonic = time.monotonic()
         self.total_frames = 0
         self.good_frames = 0
         self.bad_frames = 0
         self.current_bad_duration = 0
         self.longest_bad_duration = 0
         self.bad_posture_start = None
-        self.score_history = []
-        self.posture_history = []
+        # Running total for the average score (scores are ints, so it stays exact)
+        self.score_sum = 0
+        # (monotonic time, status, score) for the most recent frames
+        self.posture_history = deque(maxlen=SCORE_HISTORY_SIZE)
         
     def update(self, result: PostureResult):
         """Update session with new frame result"""
         self.total_frames += 1
+        now = time.monotonic()
         
         if result.is_good_posture:
             self.good_frames += 1
@@ -360,24 +470,24 @@ class PostureSession:
             self.bad_frames += 1
             # Track bad posture duration
             if self.bad_posture_start is None:
-                self.bad_posture_start = datetime.now()
+                self.bad_posture_start = now
             else:
-                self.current_bad_duration = (datetime.now() - self.bad_posture_start).total_seconds()
+                self.current_bad_duration = now - self.bad_posture_start
         
         # Store history
-        self.score_history.append(result.posture_score)
-        self.posture_history.append({
-            "timestamp": datetime.now().isoformat(),
-            "status": result.posture_status,
-            "score": result.posture_score
-        })
+        self.score_sum += result.posture_score
+        self.posture_history.append((now, result.posture_status, result.posture_score))
     
+    def average_score(self) -> float:
+        """Mean posture score over every frame in the session"""
+        return self.score_sum / self.total_frames if self.total_frames else 0
+
     def get_statistics(self) -> Dict:
         """Get session statistics"""
-        duration = (datetime.now() - self.start_time).total_seconds()
+        duration = time.monotonic() - self.start_monotonic
         good_percent = (self.good_frames / self.total_frames * 100) if self.total_frames > 0 else 0
         bad_percent = (self.bad_frames / self.total_frames * 100) if self.total_frames > 0 else 0
-        avg_score = sum(self.score_history) / len(self.score_history) if self.score_history else 0
+        avg_score = self.average_score()
         
         return {
             "session_id": self.session_id,
@@ -1,66 +1,162 @@
 """
 Database handler for posture sessions
-Stores session data in CSV format (matching posture_sessions.csv structure)
+Stores session data in SQLite (same fields as the original posture_sessions.csv);
+an existing CSV file is imported on first use
 """
 
 import csv
+import math
 import os
+import sqlite3
+import threading
 from datetime import datetime
 from typing import List, Dict, Optional
 from pathlib import Path
 
 
+# Column order of the sessions table (and of the legacy CSV file)
+SESSION_FIELDS = [
+    "timestamp",
+    "session_id",
+    "session_seconds",
+    "total_frames",
+    "good_frames",
+    "bad_frames",
+    "good_percent",
+    "bad_percent",
+    "average_score",
+    "longest_bad_secs"
+]
+
+# Numeric columns and their types, used when importing CSV text
+NUMERIC_FIELDS = {
+    "session_seconds": float,
+    "total_frames": int,
+    "good_frames": int,
+    "bad_frames": int,
+    "good_percent": float,
+    "bad_percent": float,
+    "average_score": float,
+    "longest_bad_secs": float
+}
+
+
+def parse_number(value, kind=float):
+    """Parse a CSV field as a number, or None if it is missing, malformed or not finite"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return kind(number) if math.isfinite(number) else None
+
+
 class PostureDatabase:
     """Handle posture session data storage"""
     
-    def __init__(self, csv_file: str = "posture_sessions.csv"):
-        """Initialize database with CSV file"""
+    def __init__(self, db_file: str = "posture_sessions.db", csv_file: str = "posture_sessions.csv"):
+        """
+        Initialize database with SQLite file
+        
+        Args:
+            db_file: SQLite database path
+            csv_file: Legacy CSV file, imported when the database is first created
+        """
+        self.db_file = db_file
         self.csv_file = csv_file
-        self._initialize_csv()
+        is_new = not os.path.exists(db_file)
+        
+        # One connection for the object's lifetime, shared across threads under a lock
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._initialize_db(is_new)
     
-    def _initialize_csv(self):
-        """Create CSV file with headers if it doesn't exist"""
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+    
+    def _initialize_db(self, is_new: bool):
+        """Create the sessions table and indexes if they don't exist"""
+        with self._lock, self._conn as conn:
+            # WAL lets reads run alongside writes; NORMAL sync is safe in WAL mode
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    timestamp TEXT,
+                    session_id TEXT,
+                    session_seconds REAL,
+                    total_frames INTEGER,
+                    good_frames INTEGER,
+                    bad_frames INTEGER,
+                    good_percent REAL,
+                    bad_percent REAL,
+                    average_score REAL,
+                    longest_bad_secs REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_session_id ON sessions (session_id)")
+            
+            if is_new:
+                self._import_csv(conn)
+    
+    def _import_csv(self, conn: sqlite3.Connection):
+        """Copy sessions from the legacy CSV file into a new database"""
         if not os.path.exists(self.csv_file):
-            with open(self.csv_file, mode='w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    "timestamp",
-                    "session_id",
-                    "session_seconds",
-                    "total_frames",
-                    "good_frames",
-                    "bad_frames",
-                    "good_percent",
-                    "bad_percent",
-                    "average_score",
-                    "longest_bad_secs"
-                ])
+            return
+        
+        try:
+            with open(self.csv_file, mode='r', newline='') as f:
+                rows = [
+                    [
+                        parse_number(row.get(field), NUMERIC_FIELDS[field])
+                        if field in NUMERIC_FIELDS else row.get(field)
+                        for field in SESSION_FIELDS
+                    ]
+                    for row in csv.DictReader(f)
+                ]
+            conn.executemany(
+                f"INSERT INTO sessions VALUES ({', '.join('?' * len(SESSION_FIELDS))})",
+                rows
+            )
+        except Exception as e:
+            print(f"Error importing sessions from {self.csv_file}: {e}")
+    
+    @staticmethod
+    def _row_to_dict(row: tuple) -> Dict:
+        """Session row as a dict of strings, as the CSV store returned them"""
+        return {
+            field: "" if value is None else str(value)
+            for field, value in zip(SESSION_FIELDS, row)
+        }
     
     def save_session(self, session_data: Dict) -> bool:
         """
-        Save a posture session to CSV
+        Save a posture session to the database
         
         Args:
             session_data: Dictionary containing session information
-            
+        
         Returns:
             True if saved successfully
         """
         try:
-            with open(self.csv_file, mode='a', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    session_data.get('end_time', datetime.now().isoformat()),
-                    session_data.get('session_id', ''),
-                    round(session_data.get('duration_seconds', 0), 2),
-                    session_data.get('total_frames', 0),
-                    session_data.get('good_frames', 0),
-                    session_data.get('bad_frames', 0),
-                    round(session_data.get('good_percent', 0), 2),
-                    round(session_data.get('bad_percent', 0), 2),
-                    round(session_data.get('average_score', 0), 2),
-                    round(session_data.get('longest_bad_duration', 0), 2)
-                ])
+            with self._lock, self._conn as conn:
+                conn.execute(
+                    f"INSERT INTO sessions VALUES ({', '.join('?' * len(SESSION_FIELDS))})",
+                    (
+                        session_data.get('end_time', datetime.now().isoformat()),
+                        session_data.get('session_id', ''),
+                        round(session_data.get('duration_seconds', 0), 2),
+                        session_data.get('total_frames', 0),
+                        session_data.get('good_frames', 0),
+                        session_data.get('bad_frames', 0),
+                        round(session_data.get('good_percent', 0), 2),
+                        round(session_data.get('bad_percent', 0), 2),
+                        round(session_data.get('average_score', 0), 2),
+                        round(session_data.get('longest_bad_duration', 0), 2)
+                    )
+                )
             return True
         except Exception as e:
             print(f"Error saving session: {e}")
@@ -68,22 +164,15 @@ class PostureDatabase:
     
     def get_all_sessions(self) -> List[Dict]:
         """
-        Retrieve all posture sessions from CSV
+        Retrieve all posture sessions
         
         Returns:
-            List of session dictionaries
+            List of session dictionaries, oldest first
         """
-        sessions = []
-        
-        if not os.path.exists(self.csv_file):
-            return sessions
-        
         try:
-            with open(self.csv_file, mode='r', newline='') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    sessions.append(row)
-            return sessions
+            with self._lock:
+                rows = self._conn.execute("SELECT * FROM sessions ORDER BY rowid").fetchall()
+            return [self._row_to_dict(row) for row in rows]
         except Exception as e:
             print(f"Error reading sessions: {e}")
             return []
@@ -94,15 +183,20 @@ class PostureDatabase:
         
         Args:
             session_id: Session identifier
-            
+        
         Returns:
             Session dictionary or None
         """
-        sessions = self.get_all_sessions()
-        for session in sessions:
-            if session.get('session_id') == session_id:
-                return session
-        return None
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT * FROM sessions WHERE session_id = ? ORDER BY rowid LIMIT 1",
+                    (session_id,)
+                ).fetchone()
+            return self._row_to_dict(row) if row is not None else None
+        except Exception as e:
+            print(f"Error reading session: {e}")
+            return None
     
     def get_recent_sessions(self, limit: int = 10) -> List[Dict]:
         """
@@ -110,12 +204,20 @@ class PostureDatabase:
         
         Args:
             limit: Maximum number of sessions to return
-            
+        
         Returns:
-            List of recent session dictionaries
+            List of recent session dictionaries, oldest first
         """
-        sessions = self.get_all_sessions()
-        return sessions[-limit:] if sessions else []
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT * FROM sessions ORDER BY rowid DESC LIMIT ?",
+                    (limit,)
+                ).fetchall()
+            return [self._row_to_dict(row) for row in reversed(rows)]
+        except Exception as e:
+            print(f"Error reading sessions: {e}")
+            return []
     
     def get_statistics(self) -> Dict:
         """
@@ -124,9 +226,23 @@ class PostureDatabase:
         Returns:
             Dictionary with aggregate statistics
         """
-        sessions = self.get_all_sessions()
+        try:
+            # Malformed imported values are stored as NULL, which the aggregates skip
+            with self._lock:
+                total_sessions, total_duration, avg_good, avg_bad, avg_score = self._conn.execute("""
+                    SELECT
+                        COUNT(*),
+                        SUM(session_seconds),
+                        AVG(good_percent),
+                        AVG(bad_percent),
+                        AVG(average_score)
+                    FROM sessions
+                """).fetchone()
+        except Exception as e:
+            print(f"Error reading statistics: {e}")
+            total_sessions = 0
         
-        if not sessions:
+        if not total_sessions:
             return {
                 "total_sessions": 0,
                 "total_duration": 0,
@@ -135,39 +251,12 @@ class PostureDatabase:
                 "average_score": 0
             }
         
-        total_duration = 0
-        total_good_percent = 0
-        total_bad_percent = 0
-        total_score = 0
-        valid_sessions = 0
-        
-        for session in sessions:
-            try:
-                # Skip sessions with invalid data
-                if session.get('session_seconds', '').replace('.', '').replace('-', '').isdigit():
-                    total_duration += float(session.get('session_seconds', 0))
-                
-                good_pct = session.get('good_percent', '')
-                if good_pct and good_pct.replace('.', '').replace('-', '').isdigit():
-                    total_good_percent += float(good_pct)
-                    valid_sessions += 1
-                
-                bad_pct = session.get('bad_percent', '')
-                if bad_pct and bad_pct.replace('.', '').replace('-', '').isdigit():
-                    total_bad_percent += float(bad_pct)
-                
-                score = session.get('average_score', '')
-                if score and score.replace('.', '').replace('-', '').isdigit():
-                    total_score += float(score)
-            except (ValueError, TypeError):
-                continue
-        
         return {
-            "total_sessions": len(sessions),
-            "total_duration_seconds": round(total_duration, 2),
-            "average_good_percent": round(total_good_percent / valid_sessions, 2) if valid_sessions > 0 else 0,
-            "average_bad_percent": round(total_bad_percent / valid_sessions, 2) if valid_sessions > 0 else 0,
-            "average_score": round(total_score / valid_sessions, 2) if valid_sessions > 0 else 0
+            "total_sessions": total_sessions,
+            "total_duration_seconds": round(total_duration or 0, 2),
+            "average_good_percent": round(avg_good or 0, 2),
+            "average_bad_percent": round(avg_bad or 0, 2),
+            "average_score": round(avg_score or 0, 2)
         }
     
     def delete_session(self, session_id: str) -> bool:
@@ -176,35 +265,13 @@ class PostureDatabase:
         
         Args:
             session_id: Session identifier
-            
+        
         Returns:
             True if deleted successfully
         """
         try:
-            sessions = self.get_all_sessions()
-            sessions = [s for s in sessions if s.get('session_id') != session_id]
-            
-            # Rewrite CSV without the deleted session
-            with open(self.csv_file, mode='w', newline='') as f:
-                if sessions:
-                    writer = csv.DictWriter(f, fieldnames=sessions[0].keys())
-                    writer.writeheader()
-                    writer.writerows(sessions)
-                else:
-                    # Recreate empty file with headers
-                    writer = csv.writer(f)
-                    writer.writerow([
-                        "timestamp",
-                        "session_id",
-                        "session_seconds",
-                        "total_frames",
-                        "good_frames",
-                        "bad_frames",
-                        "good_percent",
-                        "bad_percent",
-                        "average_score",
-                        "longest_bad_secs"
-                    ])
+            with self._lock, self._conn as conn:
+                conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
             return True
         except Exception as e:
             print(f"Error deleting session: {e}")
@@ -218,7 +285,8 @@ class PostureDatabase:
             True if cleared successfully
         """
         try:
-            self._initialize_csv()
+            with self._lock, self._conn as conn:
+                conn.execute("DELETE FROM sessions")
             return True
         except Exception as e:
             print(f"Error clearing sessions: {e}")
@@ -0,0 +1,100 @@
+"""
+Numba-compiled posture math
+Fuses keypoint scaling, metrics, classification and scoring into one call.
+analyze_points is None when numba is not installed; PostureAnalyzer then uses
+its Python methods, which compute the same values.
+"""
+
+import math
+
+try:
+    from numba import njit
+except ImportError:
+    # numba not available, PostureAnalyzer falls back to pure Python
+    njit = None
+
+
+def _analyze_points(points, width, height, thresholds):
+    """
+    Posture metrics, class and score from normalized landmark points
+
+    Args:
+        points: (5, 2) float64 array of x, y for nose, left/right shoulder, left/right hip
+        width, height: Pixel size the metrics are measured in
+        thresholds: float64 array (neck angle, spine tilt, shoulder tilt, lean, head drop)
+
+    Returns:
+        (neck_angle, spine_tilt, shoulder_tilt, nose_shoulder_dist, shoulder_mid_x,
+         nose_x, nose_y, shoulder_y_avg, status_code, score); status_code indexes
+        POSTURE_CLASSES in classify_posture's branch order
+    """
+    neck_thresh = thresholds[0]
+    spine_thresh = thresholds[1]
+    shoulder_thresh = thresholds[2]
+    lean_thresh = thresholds[3]
+    head_drop_thresh = thresholds[4]
+
+    # Keypoints in pixels (truncated like int())
+    nose_x = int(points[0, 0] * width)
+    nose_y = int(points[0, 1] * height)
+    ls_x = int(points[1, 0] * width)
+    ls_y = int(points[1, 1] * height)
+    rs_x = int(points[2, 0] * width)
+    rs_y = int(points[2, 1] * height)
+    lh_x = int(points[3, 0] * width)
+    lh_y = int(points[3, 1] * height)
+    rh_x = int(points[4, 0] * width)
+    rh_y = int(points[4, 1] * height)
+
+    # Midpoints; the arithmetic shift floors like // 2
+    neck_x = (ls_x + rs_x) >> 1
+    neck_y = (ls_y + rs_y) >> 1
+    mid_hip_x = (lh_x + rh_x) >> 1
+    mid_hip_y = (lh_y + rh_y) >> 1
+
+    # Angle at the neck between nose and mid hip
+    ba_x = nose_x - neck_x
+    ba_y = nose_y - neck_y
+    bc_x = mid_hip_x - neck_x
+    bc_y = mid_hip_y - neck_y
+    neck_angle = abs(math.degrees(math.atan2(ba_x * bc_y - ba_y * bc_x, ba_x * bc_x + ba_y * bc_y)))
+
+    spine_tilt = abs(neck_x - mid_hip_x)
+    shoulder_tilt = abs(ls_y - rs_y)
+    shoulder_mid_x = neck_x
+    shoulder_y_avg = neck_y
+    nose_shoulder_dist = abs(nose_y - shoulder_y_avg)
+
+    # Classification, same branch order as PostureAnalyzer.classify_posture
+    if nose_y > shoulder_y_avg + head_drop_thresh:
+        status_code = 0
+    elif nose_y > shoulder_y_avg + head_drop_thresh // 2:
+        status_code = 1
+    elif nose_shoulder_dist < 140:
+        status_code = 2
+    elif nose_shoulder_dist > 200:
+        status_code = 3
+    elif nose_x > shoulder_mid_x + lean_thresh * 2.4:
+        status_code = 4
+    elif nose_x < shoulder_mid_x - lean_thresh * 2.4:
+        status_code = 5
+    elif nose_x > shoulder_mid_x + lean_thresh * 0.5:
+        status_code = 6
+    elif nose_x < shoulder_mid_x - lean_thresh * 0.5:
+        status_code = 7
+    elif (neck_angle >= neck_thresh - 3 and
+          spine_tilt <= spine_thresh + 3 and
+          shoulder_tilt <= shoulder_thresh + 3):
+        status_code = 8
+    else:
+        status_code = 9
+
+    penalty = abs(neck_thresh - neck_angle) + spine_tilt + shoulder_tilt
+    score = max(0, min(100, int(100.0 - 0.4 * penalty)))
+
+    return (neck_angle, spine_tilt, shoulder_tilt, nose_shoulder_dist, shoulder_mid_x,
+            nose_x, nose_y, shoulder_y_avg, status_code, score)
+
+
+# Compiled once and cached on disk so restarts skip the JIT
+analyze_points = njit(cache=True)(_analyze_points) if njit is not None else None
@@ -0,0 +1,123 @@
+"""
+In-memory store for active posture sessions
+Bounds memory with idle expiry (TTL) and least-recently-used eviction;
+sessions the caller marks as in use (e.g. with a live WebSocket) are kept
+"""
+
+import time
+from collections import OrderedDict
+from typing import Callable, Iterator, Optional, Tuple
+
+from posture_analysis import PostureSession
+
+
+class SessionStore:
+    """Active posture sessions keyed by session_id, with TTL + LRU eviction"""
+
+    # Reasons passed to on_evict
+    EXPIRED = "expired"
+    EVICTED = "evicted"
+
+    def __init__(self,
+                 max_sessions: int = 1000,
+                 ttl_seconds: float = 3600,
+                 on_evict: Optional[Callable[[PostureSession, str], None]] = None,
+                 in_use: Optional[Callable[[str], bool]] = None):
+        """
+        Initialize the store
+
+        Args:
+            max_sessions: Maximum number of sessions kept at once; in-use
+                sessions can push the store past it
+            ttl_seconds: Idle time after which a session expires
+            on_evict: Called with each session dropped and the reason,
+                EXPIRED (idle past the TTL) or EVICTED (over max_sessions)
+            in_use: Called with a session_id; sessions it reports as in use
+                are never expired or evicted
+        """
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.on_evict = on_evict
+        self.in_use = in_use
+        # session_id -> (session, last access time), oldest first
+        self._sessions: "OrderedDict[str, Tuple[PostureSession, float]]" = OrderedDict()
+
+    def _is_in_use(self, session_id: str) -> bool:
+        return self.in_use is not None and self.in_use(session_id)
+
+    def _evict(self, session_id: str, reason: str):
+        """Drop a session and hand it to the eviction callback"""
+        session, _ = self._sessions.pop(session_id)
+        if self.on_evict is not None:
+            self.on_evict(session, reason)
+
+    def _expire(self):
+        """Drop sessions that have been idle longer than the TTL"""
+        deadline = time.monotonic() - self.ttl_seconds
+        # Bounded, since refreshed in-use sessions come back around to the front
+        for _ in range(len(self._sessions)):
+            session_id, (_, last_seen) = next(iter(self._sessions.items()))
+            if last_seen > deadline:
+                break
+            if self._is_in_use(session_id):
+                # Still connected, so not idle: move it to the back with a fresh TTL
+                self.touch(session_id)
+            else:
+                self._evict(session_id, self.EXPIRED)
+
+    def touch(self, session_id: str):
+        """Mark a session as recently used"""
+        if session_id in self._sessions:
+            session, _ = self._sessions[session_id]
+            self._sessions[session_id] = (session, time.monotonic())
+            self._sessions.move_to_end(session_id)
+
+    def get(self, session_id: str) -> Optional[PostureSession]:
+        """Get a session and refresh its TTL, or None if missing/expired"""
+        self._expire()
+        if session_id not in self._sessions:
+            return None
+        self.touch(session_id)
+        return self._sessions[session_id][0]
+
+    def pop(self, session_id: str, default=None) -> Optional[PostureSession]:
+        """Remove a session without calling the eviction callback"""
+        entry = self._sessions.pop(session_id, None)
+        return entry[0] if entry is not None else default
+
+    def items(self) -> Iterator[Tuple[str, PostureSession]]:
+        """Iterate over live (session_id, session) pairs"""
+        self._expire()
+        for session_id, (session, _) in list(self._sessions.items()):
+            yield session_id, session
+
+    def __contains__(self, session_id: str) -> bool:
+        self._expire()
+        return session_id in self._sessions
+
+    def __getitem__(self, session_id: str) -> PostureSession:
+        session = self.get(session_id)
+        if session is None:
+            raise KeyError(session_id)
+        return session
+
+    def __setitem__(self, session_id: str, session: PostureSession):
+        self._expire()
+        self._sessions[session_id] = (session, time.monotonic())
+        self._sessions.move_to_end(session_id)
+
+        # Evict least recently used sessions over capacity, skipping in-use ones
+        # and the session just stored
+        while len(self._sessions) > self.max_sessions:
+            victim = next((sid for sid in self._sessions
+                           if sid != session_id and not self._is_in_use(sid)), None)
+            if victim is None:
+                break
+            self._evict(victim, self.EVICTED)
+
+    def __delitem__(self, session_id: str):
+        del self._sessions[session_id]
+
+    def __len__(self) -> int:
+        self._expire()
+        return len(self._sessions)
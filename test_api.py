@@ -7,7 +7,7 @@ import requests
 import json
 import base64
 from io import BytesIO
-from PIL import Image
+import cv2
 import numpy as np
 
 # API Base URL
@@ -21,17 +21,19 @@ def test_health_check():
     print(f"Response: {response.json()}")
     return response.status_code == 200
 
+def _encode_test_jpeg():
+    """Encode a 640x480 solid-color test JPEG"""
+    # BGR for RGB (73, 109, 137)
+    img = np.full((480, 640, 3), (137, 109, 73), dtype=np.uint8)
+    _, encoded = cv2.imencode('.jpg', img)
+    return encoded.tobytes()
+
+# Encoded once; every test uploads the same bytes
+TEST_JPEG = _encode_test_jpeg()
+
 def create_test_image():
     """Create a simple test image"""
-    # Create a 640x480 test image with random pixels
-    img = Image.new('RGB', (640, 480), color=(73, 109, 137))
-    
-    # Save to bytes
-    img_bytes = BytesIO()
-    img.save(img_bytes, format='JPEG')
-    img_bytes.seek(0)
-    
-    return img_bytes
+    return BytesIO(TEST_JPEG)
 
 def test_start_session():
     """Test starting a posture session"""
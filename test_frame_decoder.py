@@ -0,0 +1,54 @@
+"""
+Tests for utils.FrameDecoder
+Run with: python -m pytest test_frame_decoder.py
+"""
+
+import cv2
+import numpy as np
+
+from utils import FrameDecoder, MAX_POSE_SIDE
+
+# BGR fill color of the test frames
+COLOR = (137, 109, 73)
+
+def encode_frame(ext, width, height):
+    """Encode a solid-color width x height frame with OpenCV"""
+    image = np.full((height, width, 3), COLOR, dtype=np.uint8)
+    ok, encoded = cv2.imencode(ext, image)
+    assert ok
+    return encoded.tobytes()
+
+def assert_frame(frame, width, height):
+    """Frame is BGR, fits MAX_POSE_SIDE with the source aspect ratio, and keeps the color"""
+    assert frame.dtype == np.uint8 and frame.ndim == 3 and frame.shape[2] == 3
+    assert max(frame.shape[:2]) <= MAX_POSE_SIDE
+    assert abs(frame.shape[1] / frame.shape[0] - width / height) < 0.01
+    assert np.abs(frame.astype(int) - COLOR).max() <= 3
+
+def test_decode_jpeg():
+    frame, size = FrameDecoder().decode(encode_frame('.jpg', 640, 480))
+    assert size == (640, 480)
+    assert frame.shape == (480, 640, 3)
+    assert_frame(frame, 640, 480)
+
+def test_decode_png():
+    frame, size = FrameDecoder().decode(encode_frame('.png', 640, 480))
+    assert size == (640, 480)
+    assert frame.shape == (480, 640, 3)
+    assert_frame(frame, 640, 480)
+
+def test_decode_large_odd_jpeg_reports_header_size():
+    # Decoded at 1/2 size; the scaled dimensions round up, the reported size must not
+    frame, size = FrameDecoder().decode(encode_frame('.jpg', 2001, 1001))
+    assert size == (2001, 1001)
+    assert_frame(frame, 2001, 1001)
+
+def test_decoder_reuse_across_sizes():
+    decoder = FrameDecoder()
+    for ext, width, height in (('.jpg', 1920, 1080), ('.png', 1920, 1080), ('.jpg', 640, 480)):
+        frame, size = decoder.decode(encode_frame(ext, width, height))
+        assert size == (width, height)
+        assert_frame(frame, width, height)
+
+def test_decode_invalid_bytes():
+    assert FrameDecoder().decode(b'not an image') == (None, None)
@@ -0,0 +1,42 @@
+"""
+Tests for session_store.SessionStore
+Run with: python -m pytest test_session_store.py
+"""
+
+from session_store import SessionStore
+
+def make_store(max_sessions=2, ttl_seconds=3600, connected=()):
+    """Store recording (session_id, reason) for every dropped session"""
+    dropped = []
+    store = SessionStore(
+        max_sessions=max_sessions,
+        ttl_seconds=ttl_seconds,
+        on_evict=lambda session, reason: dropped.append((session, reason)),
+        in_use=lambda session_id: session_id in connected
+    )
+    return store, dropped
+
+def test_lru_eviction_reports_reason():
+    store, dropped = make_store()
+    store['a'], store['b'], store['c'] = 'a', 'b', 'c'
+    assert dropped == [('a', SessionStore.EVICTED)]
+    assert 'a' not in store and 'c' in store
+
+def test_eviction_skips_connected_sessions():
+    store, dropped = make_store(connected={'a'})
+    store['a'], store['b'], store['c'] = 'a', 'b', 'c'
+    assert dropped == [('b', SessionStore.EVICTED)]
+    assert 'a' in store
+
+def test_all_connected_sessions_exceed_the_limit():
+    store, dropped = make_store(max_sessions=1, connected={'a', 'b'})
+    store['a'], store['b'] = 'a', 'b'
+    assert dropped == []
+    assert len(store) == 2
+
+def test_expiry_skips_connected_sessions():
+    store, dropped = make_store(max_sessions=10, ttl_seconds=0, connected={'a'})
+    store['a'], store['b'] = 'a', 'b'
+    assert 'b' not in store
+    assert dropped == [('b', SessionStore.EXPIRED)]
+    assert store.get('a') == 'a'
@@ -0,0 +1,84 @@
+"""
+Tests for the image header helpers in utils
+Run with: python -m pytest test_utils.py
+"""
+
+import struct
+
+import cv2
+import numpy as np
+
+from utils import FrameDecoder, read_image_for_pose, read_image_from_bytes, read_image_size, read_jpeg_orientation
+
+def encode_image(ext, width, height, params=()):
+    """Encode a solid-color width x height image with OpenCV"""
+    image = np.full((height, width, 3), (137, 109, 73), dtype=np.uint8)
+    ok, encoded = cv2.imencode(ext, image, list(params))
+    assert ok
+    return encoded.tobytes()
+
+def exif_segment(orientation=1, byte_order='>'):
+    """APP1 Exif segment holding a TIFF IFD with one Orientation entry"""
+    tiff = (b'MM' if byte_order == '>' else b'II') + struct.pack(byte_order + 'HI', 0x2a, 8)
+    tiff += struct.pack(byte_order + 'H', 1) + struct.pack(byte_order + 'HHIHH', 0x0112, 3, 1, orientation, 0)
+    tiff += struct.pack(byte_order + 'I', 0)
+    payload = b'Exif\x00\x00' + tiff
+    return b'\xff\xe1' + struct.pack('>H', len(payload) + 2) + payload
+
+def insert_after_soi(jpeg, data):
+    """Insert bytes right after a JPEG's start-of-image marker"""
+    assert jpeg[:2] == b'\xff\xd8'
+    return jpeg[:2] + data + jpeg[2:]
+
+def test_baseline_jpeg():
+    assert read_image_size(encode_image('.jpg', 640, 480)) == (640, 480)
+
+def test_progressive_jpeg():
+    jpeg = encode_image('.jpg', 1001, 333, (cv2.IMWRITE_JPEG_PROGRESSIVE, 1))
+    assert b'\xff\xc2' in jpeg  # SOF2
+    assert read_image_size(jpeg) == (1001, 333)
+
+def test_exif_prefixed_jpeg():
+    jpeg = insert_after_soi(encode_image('.jpg', 1200, 400), exif_segment(6))
+    assert read_image_size(jpeg) == (1200, 400)
+
+def test_fill_byte_padded_jpeg():
+    # 0xFF fill bytes may precede any marker
+    jpeg = insert_after_soi(encode_image('.jpg', 320, 240), b'\xff\xff\xff')
+    assert read_image_size(jpeg) == (320, 240)
+
+def test_truncated_jpeg():
+    jpeg = encode_image('.jpg', 640, 480)
+    sof = jpeg.index(b'\xff\xc0')
+    assert read_image_size(jpeg[:sof]) is None      # before the frame header
+    assert read_image_size(jpeg[:sof + 6]) is None  # inside the frame header
+    assert read_image_size(b'\xff\xd8') is None
+
+def test_png():
+    png = encode_image('.png', 1920, 1080)
+    assert read_image_size(png) == (1920, 1080)
+    assert read_image_size(png[:20]) is None
+
+def test_not_an_image():
+    assert read_image_size(b'GIF89a' + b'\x00' * 32) is None
+    assert read_image_size(b'') is None
+
+def test_jpeg_orientation():
+    jpeg = encode_image('.jpg', 1200, 400)
+    assert read_jpeg_orientation(jpeg) == 1
+    assert read_jpeg_orientation(insert_after_soi(jpeg, exif_segment(6))) == 6
+    assert read_jpeg_orientation(insert_after_soi(jpeg, exif_segment(3, '<'))) == 3
+    assert read_jpeg_orientation(insert_after_soi(jpeg, exif_segment(6))[:20]) == 1
+
+def test_rotated_jpeg_is_decoded_upright():
+    # Orientation 6: stored 1200x400 landscape, displayed as 400x1200 portrait
+    jpeg = insert_after_soi(encode_image('.jpg', 1200, 400), exif_segment(6))
+    assert read_image_from_bytes(jpeg).shape == (1200, 400, 3)
+    
+    image, size = read_image_for_pose(jpeg)
+    assert size == (400, 1200)
+    assert image.shape[0] > image.shape[1]
+    
+    frame, size = FrameDecoder().decode(jpeg)
+    assert size == (400, 1200)
+    assert frame.shape[0] > frame.shape[1]
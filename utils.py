@@ -1,20 +1,252 @@
+import binascii
 import cv2
 import numpy as np
+import struct
 from io import BytesIO
+from typing import Optional, Tuple
 
-def read_image_from_bytes(image_bytes):
-    """Convert image bytes to OpenCV format"""
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+    _jpeg = TurboJPEG()
+except Exception:
+    # PyTurboJPEG or libturbojpeg not available, use OpenCV's codecs
+    _jpeg = None
+
+try:
+    import pybase64
+except ImportError:
+    # SIMD base64 not installed, use the stdlib codec
+    pybase64 = None
+
+# Annotated preview images: quality 80, baseline (non-progressive) JPEG
+JPEG_QUALITY = 80
+
+# JPEG start-of-frame markers that carry the image dimensions
+# (0xFFC4 DHT, 0xFFC8 JPG and 0xFFCC DAC share the range but are not frames)
+JPEG_SOF_MARKERS = frozenset(range(0xFFC0, 0xFFCF + 1)) - {0xFFC4, 0xFFC8, 0xFFCC}
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Precompiled header layouts (big-endian)
+_JPEG_SEGMENT = struct.Struct('>HH')   # marker, segment length
+_JPEG_SOF_SIZE = struct.Struct('>HH')  # height, width
+_PNG_IHDR = struct.Struct('>II')       # width, height
+
+# EXIF (TIFF) Orientation tag; 1 means the stored pixels are already upright
+EXIF_HEADER = b'Exif\x00\x00'
+EXIF_ORIENTATION_TAG = 0x0112
+
+# Longest side fed to the pose models; they resize internally anyway
+MAX_POSE_SIDE = 960
+
+# Side of the grayscale thumbnails compared for motion gating
+MOTION_THUMB_SIZE = 8
+
+# OpenCV decode flags for libjpeg's DCT-domain downscaling (1/reduce size)
+IMREAD_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+def to_base64(data) -> str:
+    """Base64-encode bytes (or any contiguous buffer) into an ASCII str"""
+    if pybase64 is not None:
+        return pybase64.b64encode_as_string(data)
+    return binascii.b2a_base64(data, newline=False).decode('ascii')
+
+def read_image_from_bytes(image_bytes, reduce: int = 1):
+    """Convert image bytes to OpenCV format, optionally decoded at 1/reduce size"""
     try:
+        # TurboJPEG ignores EXIF orientation; OpenCV applies it
+        if _jpeg is not None and image_bytes[:2] == b'\xff\xd8' and read_jpeg_orientation(image_bytes) == 1:
+            try:
+                return _jpeg.decode(image_bytes, pixel_format=TJPF_BGR,
+                                    scaling_factor=(1, reduce))
+            except OSError:
+                pass  # libjpeg-turbo rejected the data, let OpenCV try
         nparr = np.frombuffer(image_bytes, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        image = cv2.imdecode(nparr, IMREAD_FLAGS[reduce])
         return image
     except Exception as e:
         raise ValueError(f"Error reading image: {str(e)}")
 
-def image_to_bytes(image):
-    """Convert OpenCV image to bytes"""
+def pose_reduction(size: Tuple[int, int], max_side: int = MAX_POSE_SIDE) -> int:
+    """Largest JPEG decode reduction (1, 2, 4, 8) keeping the longest side >= max_side"""
+    reduce = 1
+    while reduce < 8 and max(size) // (reduce * 2) >= max_side:
+        reduce *= 2
+    return reduce
+
+def full_resolution_size(size: Optional[Tuple[int, int]], frame: np.ndarray, reduce: int) -> Tuple[int, int]:
+    """
+    (width, height) of the original image behind a frame decoded at 1/reduce size
+    
+    Prefers the header size: scaled decodes round their dimensions up, so
+    multiplying them back would overstate odd sizes. OpenCV applies EXIF
+    rotation, so the header size is swapped when the frame came out rotated.
+    """
+    height, width = frame.shape[:2]
+    if size is None:
+        return width * reduce, height * reduce
+    header_width, header_height = size
+    if (header_width != header_height
+            and (width, height) == (-(-header_height // reduce), -(-header_width // reduce))):
+        return header_height, header_width
+    return header_width, header_height
+
+def read_image_for_pose(image_bytes, max_side: int = MAX_POSE_SIDE):
+    """
+    Decode image bytes and downscale so the longest side is at most max_side
+    
+    Large JPEGs are decoded directly at 1/2, 1/4 or 1/8 size (the decoder skips
+    the high-frequency DCT work), leaving at most a small residual resize.
+    
+    Returns:
+        (image, (width, height) of the full-resolution image), or (None, None)
+    """
+    size = read_image_size(image_bytes)
+    reduce = pose_reduction(size, max_side) if size is not None else 1
+    
+    image = read_image_from_bytes(image_bytes, reduce)
+    if image is None:
+        return None, None
+    
+    full_size = full_resolution_size(size, image, reduce)
+    scale = max_side / max(image.shape[:2])
+    if scale < 1:
+        image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return image, full_size
+
+class FrameDecoder:
+    """
+    Decode a stream of frames for pose analysis, downscaling into a reused buffer
+    
+    Each decode may overwrite the frame returned by the previous one, so use one
+    decoder per sequential stream (e.g. a WebSocket connection) and don't keep
+    frames across calls.
+    """
+    
+    def __init__(self, max_side: int = MAX_POSE_SIDE):
+        self.max_side = max_side
+        self._resized: Optional[np.ndarray] = None
+    
+    def decode(self, image_bytes):
+        """Same contract as read_image_for_pose: (image, full-resolution (width, height))"""
+        # TurboJPEG ignores EXIF orientation, so rotated JPEGs go through OpenCV
+        if _jpeg is not None and image_bytes[:2] == b'\xff\xd8' and read_jpeg_orientation(image_bytes) == 1:
+            try:
+                width, height, _, _ = _jpeg.decode_header(image_bytes)
+                reduce = pose_reduction((width, height), self.max_side)
+                frame = _jpeg.decode(image_bytes, pixel_format=TJPF_BGR,
+                                     scaling_factor=(1, reduce))
+                return self._fit(frame), (width, height)
+            except OSError:
+                pass  # libjpeg-turbo rejected the data, let OpenCV try
+        
+        size = read_image_size(image_bytes)
+        reduce = pose_reduction(size, self.max_side) if size is not None else 1
+        try:
+            frame = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), IMREAD_FLAGS[reduce])
+        except Exception as e:
+            raise ValueError(f"Error reading image: {str(e)}")
+        if frame is None:
+            return None, None
+        return self._fit(frame), full_resolution_size(size, frame, reduce)
+    
+    def _fit(self, frame: np.ndarray) -> np.ndarray:
+        """Resize frame so its longest side is at most max_side, into the reused buffer"""
+        scale = self.max_side / max(frame.shape[:2])
+        if scale >= 1:
+            return frame
+        resized_shape = (max(1, round(frame.shape[0] * scale)), max(1, round(frame.shape[1] * scale)), 3)
+        if self._resized is None or self._resized.shape != resized_shape:
+            self._resized = np.empty(resized_shape, dtype=np.uint8)
+        return cv2.resize(frame, resized_shape[1::-1], dst=self._resized,
+                          interpolation=cv2.INTER_AREA)
+
+def motion_thumbnail(image: np.ndarray, size: int = MOTION_THUMB_SIZE) -> np.ndarray:
+    """Tiny grayscale copy of a frame for cheap inter-frame difference checks"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, (size, size), interpolation=cv2.INTER_AREA)
+
+def read_image_size(image_bytes: bytes) -> Optional[Tuple[int, int]]:
+    """Read (width, height) from a JPEG/PNG header without decoding pixels"""
+    size = len(image_bytes)
+
+    # PNG: width/height are the first two fields of the IHDR chunk
+    if image_bytes[:8] == PNG_SIGNATURE:
+        if size < 24:
+            return None
+        return _PNG_IHDR.unpack_from(image_bytes, 16)
+
+    # JPEG: walk marker segments after SOI until a start-of-frame marker
+    if image_bytes[:2] != b'\xff\xd8':
+        return None
+
+    offset = 2
+    while offset + 4 <= size:
+        marker, length = _JPEG_SEGMENT.unpack_from(image_bytes, offset)
+        if marker in JPEG_SOF_MARKERS:
+            if offset + 9 > size:
+                return None
+            height, width = _JPEG_SOF_SIZE.unpack_from(image_bytes, offset + 5)
+            return width, height
+        if marker in (0xFFD9, 0xFFDA) or marker < 0xFF00:
+            return None  # End of image, start of scan data or corrupt stream
+        if marker == 0xFF01 or 0xFFD0 <= marker <= 0xFFD7 or marker == 0xFFFF:
+            offset += 1 if marker == 0xFFFF else 2  # Fill byte or standalone marker
+            continue
+        offset += 2 + length
+
+    return None
+
+def read_jpeg_orientation(image_bytes: bytes) -> int:
+    """EXIF Orientation (1-8) from a JPEG's APP1 segment, or 1 if it has none"""
+    size = len(image_bytes)
+    offset = 2
+    while offset + 4 <= size:
+        marker, length = _JPEG_SEGMENT.unpack_from(image_bytes, offset)
+        if marker in JPEG_SOF_MARKERS or marker in (0xFFD9, 0xFFDA) or marker < 0xFF00:
+            return 1  # Metadata segments all precede the frame header
+        if marker == 0xFF01 or 0xFFD0 <= marker <= 0xFFD7 or marker == 0xFFFF:
+            offset += 1 if marker == 0xFFFF else 2  # Fill byte or standalone marker
+            continue
+        if marker == 0xFFE1 and image_bytes[offset + 4:offset + 10] == EXIF_HEADER:
+            return _exif_orientation(image_bytes, offset + 10, min(offset + 2 + length, size))
+        offset += 2 + length
+    return 1
+
+def _exif_orientation(data: bytes, tiff: int, end: int) -> int:
+    """Orientation entry of the first IFD in the TIFF block data[tiff:end], or 1"""
+    byte_order = data[tiff:tiff + 2]
+    if byte_order not in (b'II', b'MM') or tiff + 8 > end:
+        return 1
+    prefix = '<' if byte_order == b'II' else '>'
+    ifd = tiff + struct.unpack_from(prefix + 'I', data, tiff + 4)[0]
+    if ifd + 2 > end:
+        return 1
+    count = struct.unpack_from(prefix + 'H', data, ifd)[0]
+    entry = ifd + 2
+    for _ in range(count):
+        if entry + 12 > end:
+            break
+        tag, _, _, value = struct.unpack_from(prefix + 'HHIH', data, entry)
+        if tag == EXIF_ORIENTATION_TAG:
+            return value if 1 <= value <= 8 else 1
+        entry += 12
+    return 1
+
+def image_to_bytes(image, quality: int = JPEG_QUALITY):
+    """Convert OpenCV image to JPEG bytes"""
     try:
-        _, buffer = cv2.imencode('.jpg', image)
+        if _jpeg is not None:
+            return _jpeg.encode(image, quality=quality, pixel_format=TJPF_BGR)
+        _, buffer = cv2.imencode('.jpg', image, [
+            cv2.IMWRITE_JPEG_QUALITY, quality,
+            cv2.IMWRITE_JPEG_OPTIMIZE, 0,
+            cv2.IMWRITE_JPEG_PROGRESSIVE, 0
+        ])
         return buffer.tobytes()
     except Exception as e:
-        raise ValueError(f"Error converting image to bytes: {str(e)}")
\ No newline at end of file
+        raise ValueError(f"Error converting image to bytes: {str(e)}")